@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from modules.gui.main import MainWindow
 
@@ -16,6 +17,9 @@ os.environ["QT_QPA_PLATFORM_PLUGIN_PATH"] = plugin_path
 # END STOPGAP
 
 # Create and run applications
-app = QApplication(sys.argv)
-main_window = MainWindow(sys.argv)
-app.exec()
+# (not in the worker processes for batch edits, which import this module)
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    app = QApplication(sys.argv)
+    main_window = MainWindow(sys.argv)
+    app.exec()
@@ -2,7 +2,7 @@
 cd /D "%~dp0"
 cd ../../..
 call env\Scripts\activate
-START /B /WAIT cmd /c python src/assets/misc/tif_to_zarr.py
+START /B /WAIT cmd /c python src/assets/misc/tif_to_zarr.py %*
 call deactivate
 echo Press enter to exit.
 pause>nul
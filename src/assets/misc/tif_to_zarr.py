@@ -1,29 +1,64 @@
 import os
-import cv2
-import zarr
-
-from PySide6.QtWidgets import QApplication, QFileDialog
-
-input("Press enter to locate the images folder.")
-app = QApplication([])
-img_dir = QFileDialog.getExistingDirectory(
-    caption="Locate Images Folder"
-)
-if not img_dir:
-    exit()
-
-os.chdir(img_dir)
-
-zarr_name = input("\nWhat would you like to name your zarr file?: ")
-if not zarr_name.endswith(".zarr"):
-    zarr_name = zarr_name + ".zarr"
-
-for fname in os.listdir("."):
-    print(f"Working on {fname}...")
-    try:
-        cvim = cv2.imread(fname, cv2.IMREAD_GRAYSCALE)
-        zarr.save(os.path.join(zarr_name, fname), cvim)
-    except:
-        print("File is not an image.")
-
-print("Finished successfully!")
\ No newline at end of file
+import sys
+import argparse
+from pathlib import Path
+
+# add the src directory to the path
+sys.path.append(str(Path(os.path.realpath(__file__)).parents[2]))
+
+from modules.backend.func.tif_to_zarr import convertToZarr, getImageFps
+
+def getArgs():
+    """Get the converter arguments from the command line (prompt the user if not provided)."""
+    parser = argparse.ArgumentParser(description="Convert a folder of images into a multiscale zarr file.")
+    parser.add_argument("images", nargs="?", help="the folder containing the images")
+    parser.add_argument("output", nargs="?", help="the zarr file to create (default: images/<folder name>.zarr)")
+    parser.add_argument("--chunk", type=int, nargs=2, default=(1024, 1024), metavar=("H", "W"), help="the chunk shape")
+    parser.add_argument("--levels", type=int, default=None, help="the max number of pyramid levels")
+    parser.add_argument("--workers", type=int, default=None, help="the number of processes (default: all cores)")
+    parser.add_argument("--overwrite", action="store_true", help="reconvert images that are already finished")
+    args = parser.parse_args()
+
+    # fall back to the dialogs if no folder was given
+    if args.images is None:
+        from PySide6.QtWidgets import QApplication, QFileDialog
+        input("Press enter to locate the images folder.")
+        app = QApplication([])
+        args.images = QFileDialog.getExistingDirectory(
+            caption="Locate Images Folder"
+        )
+        if not args.images:
+            exit()
+        zarr_name = input("\nWhat would you like to name your zarr file?: ")
+        args.output = os.path.join(args.images, zarr_name)
+
+    if args.output is None:
+        args.output = os.path.join(args.images, os.path.basename(os.path.normpath(args.images)))
+    if not args.output.endswith(".zarr"):
+        args.output = args.output + ".zarr"
+    
+    return args
+
+if __name__ == "__main__":
+    args = getArgs()
+
+    image_fps = getImageFps(args.images)
+    if not image_fps:
+        print("No images found.")
+        exit()
+    
+    print(f"Converting {len(image_fps)} images to {args.output}...")
+    failed = convertToZarr(
+        image_fps,
+        args.output,
+        chunk_shape=args.chunk,
+        max_levels=args.levels,
+        max_workers=args.workers,
+        resume=not args.overwrite,
+        update=lambda p : print(f"Converting images | {p:.1f}%", end="\r")
+    )
+    print()
+    for fname in failed:
+        print(f"{fname} is not an image.")
+
+    print("Finished successfully!")
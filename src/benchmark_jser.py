@@ -0,0 +1,140 @@
+"""Compare the size and the save/open times of the jser formats on a synthetic series.
+
+Run from the src folder:
+    python benchmark_jser.py [--sections N] [--traces N] [--points N]
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+from modules.datatypes import Series, Trace
+
+def createSeries(wdir : str, section_count : int, trace_count : int, point_count : int) -> Series:
+    """Create a series with random traces on every section."""
+    images = [os.path.join(wdir, f"{i}.tif") for i in range(section_count)]
+    series = Series.new(images, "synthetic", 0.002, 0.05)
+    for snum in series.sections:
+        section = series.loadSection(snum)
+        for i in range(trace_count):
+            trace = Trace(f"obj{i % 50}", [255, 0, 0])
+            cx, cy = random.uniform(0, 100), random.uniform(0, 100)
+            trace.points = [
+                (cx + random.uniform(-1, 1), cy + random.uniform(-1, 1))
+                for _ in range(point_count)
+            ]
+            section.addTrace(trace)
+        section.save()
+    return series
+
+def saveJsonJser(series : Series):
+    """Save the series as a single JSON file (the format used before the container)."""
+    jser_data = {"sections": [None] * (max(series.sections.keys()) + 1)}
+    for snum, filename in series.sections.items():
+        with open(os.path.join(series.hidden_dir, filename), "r") as f:
+            jser_data["sections"][snum] = json.load(f)
+    with open(series.filepath, "r") as f:
+        jser_data["series"] = json.load(f)
+    with open(series.jser_fp, "w") as f:
+        f.write(json.dumps(jser_data))
+
+def timeIt(fn):
+    """Return the result and the time (in seconds) of a function (progress output is hidden)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - t
+
+def benchmark(template_dir : str, wdir : str, compression : str, section_format : str) -> dict:
+    """Save, edit, save, and open a copy of the template series.
+
+        Params:
+            template_dir (str): the hidden folder of the template series
+            wdir (str): the folder for the jser
+            compression (str): the container compression (None for a JSON jser)
+            section_format (str): "json" or "binary"
+        Returns:
+            (dict): the results
+    """
+    hidden_dir = os.path.join(wdir, ".synthetic")
+    shutil.copytree(template_dir, hidden_dir)
+    sections = {}
+    for f in os.listdir(hidden_dir):
+        ext = f[f.rfind(".")+1:]
+        if ext.isnumeric():
+            sections[int(ext)] = f
+    series = Series(os.path.join(hidden_dir, "synthetic.ser"), sections)
+    series.jser_fp = os.path.join(wdir, "synthetic.jser")
+    series.options["jser_compression"] = compression
+    series.options["section_format"] = section_format
+    series.save()
+    if section_format == "binary":
+        for snum in series.sections:
+            series.loadSection(snum).save()
+
+    results = {}
+    if compression is None:
+        save = lambda : saveJsonJser(series)
+    else:
+        save = series.saveJser
+    _, results["save"] = timeIt(save)
+
+    # edit one section
+    section = series.loadSection(0)
+    section.brightness = 10
+    section.save()
+    _, results["save_one"] = timeIt(save)
+    results["size"] = os.path.getsize(series.jser_fp)
+
+    # open (JSON jsers were fully extracted before)
+    series, results["open"] = timeIt(
+        lambda : Series.openJser(series.jser_fp, extract_all=(compression is None))
+    )
+    _, results["load_section"] = timeIt(lambda : series.loadSection(0))
+    series.close()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=100)
+    parser.add_argument("--traces", type=int, default=200)
+    parser.add_argument("--points", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        template_wdir = os.path.join(tmp_dir, "template")
+        os.mkdir(template_wdir)
+        print("Creating synthetic series...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            createSeries(template_wdir, args.sections, args.traces, args.points)
+        template_dir = os.path.join(template_wdir, ".synthetic")
+
+        configs = [
+            ("JSON jser", None, "json"),
+            ("container, none", "none", "json"),
+            ("container, deflate", "deflate", "json"),
+            ("container, zstd", "zstd", "json"),
+            ("container, zstd, binary", "zstd", "binary"),
+        ]
+        print(f"{'format':<26}{'size (MB)':>10}{'save (s)':>10}{'save 1 (s)':>12}{'open (s)':>10}{'load 1 (s)':>12}")
+        for i, (label, compression, section_format) in enumerate(configs):
+            wdir = os.path.join(tmp_dir, str(i))
+            os.mkdir(wdir)
+            r = benchmark(template_dir, wdir, compression, section_format)
+            print(
+                f"{label:<26}{r['size'] / 1e6:>10.2f}{r['save']:>10.3f}"
+                f"{r['save_one']:>12.3f}{r['open']:>10.3f}{r['load_section']:>12.3f}"
+            )
+    finally:
+        shutil.rmtree(tmp_dir)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from .grid import reducePoints, getExterior, mergeTraces, cutTraces
 from .import_transforms import importTransforms
 from .state_manager import SectionStates
-from .xml_json_conversions import xmlToJSON, jsonToXML
\ No newline at end of file
+from .xml_json_conversions import xmlToJSON, jsonToXML
+from .tif_to_zarr import convertToZarr
@@ -1,4 +1,5 @@
-from modules.datatypes import Series, Transform
+from modules.datatypes import Series
+from modules.datatypes.batch_edit import setTformOnSection
 
 def importTransforms(series : Series, tforms_fp : str):
         """Import transforms from a text file.
@@ -25,11 +26,12 @@ def importTransforms(series : Series, tforms_fp : str):
                 print("Incorrect transform file format")
                 return
         
-        # set tforms
-        for section_num, tform in tforms.items():
-            section = series.loadSection(section_num)
-            # multiply pixel translations by magnification of section
-            tform[2] *= section.mag
-            tform[5] *= section.mag
-            section.tforms[series.alignment] = Transform(tform)
-            section.save()
+        # set tforms (pixel translations are multiplied by the magnification of each section)
+        series.editSections(
+            setTformOnSection,
+            {
+                section_num : (series.alignment, tform, True)
+                for section_num, tform in tforms.items()
+            },
+            message="Importing transforms..."
+        )
@@ -165,6 +165,8 @@ class SectionStates():
         # restore the transforms
         restored_tforms = self.undo_states[-1].getTforms()
         section.tforms = restored_tforms
+        # the traces have been replaced
+        section.clearTraceIndex()
 
         # edit the undo/redo stacks and the current state
         self.redo_states.append(self.current_state)
@@ -201,6 +203,8 @@ class SectionStates():
         
         # restore the transforms
         section.tforms = redo_state.getTforms()
+        # the traces have been replaced
+        section.clearTraceIndex()
 
         # edit the undo/redo stacks and the current state
         self.undo_states.append(self.current_state)
@@ -0,0 +1,130 @@
+import os
+import math
+import cv2
+import zarr
+from numcodecs import Blosc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+image_exts = (".tif", ".tiff", ".png", ".jpg", ".jpeg", ".bmp")
+
+def convertToZarr(
+    image_fps : list,
+    zarr_fp : str,
+    chunk_shape : tuple = (1024, 1024),
+    max_levels : int = None,
+    max_workers : int = None,
+    resume : bool = True,
+    update = None
+):
+    """Convert a set of images into a zarr file with a multiscale pyramid per image.
+
+    Each image is stored as a group (named by the image file name) containing
+    the arrays "0" (full resolution), "1" (2x downsampled), and so on.
+
+        Params:
+            image_fps (list): the file paths for the images
+            zarr_fp (str): the file path for the zarr file
+            chunk_shape (tuple): the h and w of each chunk
+            max_levels (int): the max number of levels in each pyramid (None if no limit)
+            max_workers (int): the number of processes to use (None to use all cores)
+            resume (bool): True if images that are already converted should be skipped
+            update (function): called with the percentage of images converted
+        Returns:
+            (list): the names of the images that could not be converted
+    """
+    root = zarr.open_group(zarr_fp, mode="a")
+
+    # check for images that have already been converted
+    to_convert = []
+    for fp in image_fps:
+        name = os.path.basename(fp)
+        if resume and name in root and root[name].attrs.get("complete"):
+            continue
+        to_convert.append(fp)
+
+    failed = []
+    total = len(image_fps)
+    progress = total - len(to_convert)
+    if update: update(progress / total * 100 if total else 100)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for fp in to_convert:
+            future = executor.submit(
+                convertImage,
+                fp,
+                zarr_fp,
+                tuple(chunk_shape),
+                max_levels
+            )
+            futures[future] = fp
+        for future in as_completed(futures):
+            if not future.result():
+                failed.append(os.path.basename(futures[future]))
+            progress += 1
+            if update: update(progress / total * 100)
+
+    return failed
+
+def convertImage(image_fp : str, zarr_fp : str, chunk_shape : tuple, max_levels : int = None) -> bool:
+    """Convert a single image into a multiscale group in a zarr file (run in a worker process).
+
+        Params:
+            image_fp (str): the file path for the image
+            zarr_fp (str): the file path for the zarr file
+            chunk_shape (tuple): the h and w of each chunk
+            max_levels (int): the max number of levels in the pyramid
+        Returns:
+            (bool): True if the image was converted
+    """
+    image = cv2.imread(image_fp, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return False
+
+    name = os.path.basename(image_fp)
+    # overwrite any partially converted group
+    group = zarr.open_group(os.path.join(zarr_fp, name), mode="w")
+    compressor = Blosc(cname="zstd", clevel=5, shuffle=Blosc.NOSHUFFLE)
+
+    datasets = []
+    level = 0
+    while True:
+        group.array(
+            str(level),
+            image,
+            chunks=chunk_shape,
+            compressor=compressor
+        )
+        datasets.append({"path": str(level)})
+        level += 1
+        # stop once the image fits in a single chunk
+        h, w = image.shape
+        if h <= chunk_shape[0] and w <= chunk_shape[1]:
+            break
+        if max_levels and level >= max_levels:
+            break
+        image = cv2.resize(
+            image,
+            (math.ceil(w / 2), math.ceil(h / 2)),
+            interpolation=cv2.INTER_AREA
+        )
+
+    group.attrs["multiscales"] = [{"version": "0.4", "datasets": datasets}]
+    # mark as complete for resuming
+    group.attrs["complete"] = True
+
+    return True
+
+def getImageFps(image_dir : str) -> list:
+    """Get the file paths for the images in a directory.
+
+        Params:
+            image_dir (str): the directory containing the images
+        Returns:
+            (list): the sorted image file paths
+    """
+    image_fps = []
+    for fname in sorted(os.listdir(image_dir)):
+        if fname.lower().endswith(image_exts):
+            image_fps.append(os.path.join(image_dir, fname))
+    return image_fps
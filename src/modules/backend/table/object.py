@@ -196,7 +196,7 @@ class ObjectTableManager():
             color,
             tags,
             mode,
-            self.addTrace
+            self.objdict
         )
 
         # update the table data
@@ -226,7 +226,7 @@ class ObjectTableManager():
         self.series.editObjectRadius(
             obj_names,
             new_rad,
-            self.addTrace
+            self.objdict
         )
         
         # update the table data
@@ -22,15 +22,15 @@ class SectionTableManager():
     def loadSections(self):
         """Load all of the data for each section in the series."""
         self.data = {}
-        for snum, section in self.series.enumerateSections(
-            message="Loading section data..."
-        ):
+        # use the metadata index instead of loading every section
+        for snum in sorted(self.series.sections.keys()):
+            metadata = self.series.section_metadata[snum]
             self.data[snum] = {
-                "thickness": section.thickness,
-                "align_locked": section.align_locked,
-                "calgrid": section.calgrid,
-                "brightness": section.brightness,
-                "contrast": section.contrast
+                "thickness": metadata["thickness"],
+                "align_locked": metadata["align_locked"],
+                "calgrid": metadata["calgrid"],
+                "brightness": metadata["brightness"],
+                "contrast": metadata["contrast"]
             }
 
         # add the data to the tables
@@ -169,11 +169,8 @@ class SectionTableManager():
         self.mainwindow.saveAllData()
         
         for snum in section_numbers:
-            # delete the file
-            filename = self.series.sections[snum]
-            os.remove(os.path.join(self.series.getwdir(), filename))
-            # delete link to file
-            del(self.series.sections[snum])
+            # delete the file and the link to the file
+            self.series.deleteSection(snum)
             del(self.data[snum])
         
         # switch to first section if current section is deleted
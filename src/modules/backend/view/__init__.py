@@ -1 +1,2 @@
-from .field_view import FieldView
\ No newline at end of file
+from .field_view import FieldView
+from .prefetcher import prefetcher
@@ -1,12 +1,14 @@
 from PySide6.QtGui import QPainter
 
 from .section_layer import SectionLayer
+from .prefetcher import prefetcher
 
 from modules.datatypes import (
     Series,
     Transform,
     Trace
 )
+from modules.datatypes.batch_edit import setMagOnSection
 from modules.backend.func import SectionStates
 from modules.calc import (
     centroid,
@@ -82,6 +84,12 @@ class FieldView():
         # notify that the series has been modified
         self.mainwindow.seriesModified(True)
     
+    def closeLayers(self):
+        """Close the images of the section layers."""
+        for layer in (self.section_layer, self.b_section_layer):
+            if layer is not None:
+                layer.close()
+    
     def reloadImage(self):
         """Reload the section images (used if transform or image source is modified)."""
         self.section_layer.loadImage()
@@ -253,7 +261,9 @@ class FieldView():
         if new_section_num != self.series.current_section:
             # load section
             self.section = self.series.loadSection(new_section_num)
-            # load section view
+            # load section view (the previous b section is no longer displayed)
+            if self.section_layer is not None:
+                self.section_layer.close()
             self.section_layer = SectionLayer(self.section, self.series)
             # set new current section
             self.series.current_section = new_section_num
@@ -613,22 +623,25 @@ class FieldView():
         new_mag = self.section.mag * avg_scaling
 
         # apply new mag to every section
-        for snum, section in self.series.enumerateSections(
+        self.series.editSections(
+            setMagOnSection,
+            {snum : (new_mag,) for snum in self.series.sections},
             message="Changing series magnification..."
-        ):
-            section.setMag(new_mag)
-            section.save()
+        )
         
         # reload the field
         self.reload()
 
-    def generateView(self, pixmap_dim : tuple, generate_image=True, generate_traces=True, blend=False):
+    def generateView(self, pixmap_dim : tuple, generate_image=True, generate_traces=True, blend=False, image_callback=None, image_error_callback=None, pan=False):
         """Generate the view seen by the user in the main window.
         
             Params:
                 pixmap_dim (tuple): the w and h of the pixmap view
                 generate_image (bool): whether or not to redraw the image
                 generate_traces (bool): whether or not to redraw the traces
+                image_callback (function): if provided, images are rendered in the background and sent to this slot
+                image_error_callback (function): slot called if a background render fails
+                pan (bool): True if the window was only panned (the traces are unchanged)
         """
         # resize series window to match view proportions
         self.resizeWindow(pixmap_dim)
@@ -649,7 +662,10 @@ class FieldView():
             generate_image=generate_image,
             generate_traces=generate_traces,
             hide_traces=self.hide_trace_layer,
-            show_all_traces=self.show_all_traces
+            show_all_traces=self.show_all_traces,
+            image_callback=image_callback,
+            image_error_callback=image_error_callback,
+            pan=pan
         )
 
         # blend b section if requested
@@ -660,7 +676,10 @@ class FieldView():
                 self.series.window,
                 generate_image=generate_image,
                 generate_traces=generate_traces,
-                hide_traces=self.hide_trace_layer
+                hide_traces=self.hide_trace_layer,
+                image_callback=image_callback,
+                image_error_callback=image_error_callback,
+                pan=pan
             )
             # overlay a and b sections
             painter = QPainter(view)
@@ -668,8 +687,28 @@ class FieldView():
             painter.drawPixmap(0, 0, b_view)
             painter.end()
         
+        # warm the neighboring sections for the new view
+        if generate_image:
+            self.prefetch(pixmap_dim)
+        
         return view
     
+    def prefetch(self, pixmap_dim : tuple):
+        """Load the sections and image tiles around the current section in the background.
+        
+            Params:
+                pixmap_dim (tuple): the w and h of the pixmap view
+        """
+        loaded = [self.section.n]
+        if self.b_section is not None:
+            loaded.append(self.b_section.n)
+        prefetcher.prefetchSections(
+            self.series,
+            pixmap_dim,
+            self.series.window,
+            exclude=loaded
+        )
+    
     # CONNECT SECTIONVIEW FUNCTIONS TO FIELDVIEW CLASS
 
     def deleteTraces(self, traces=None):
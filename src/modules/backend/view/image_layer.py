@@ -1,18 +1,21 @@
 import os
+import math
 import zarr
+import cv2
+import numpy as np
+
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 from PySide6.QtCore import (
     Qt,
-    QPoint,
-    QRect
+    QRect,
+    QRectF
 )
 from PySide6.QtGui import (
     QPixmap, 
-    QImage, 
-    QPen, 
-    QColor, 
-    QPainter, 
-    QPolygon
+    QImage,
+    QPainter
 )
 os.environ['QT_IMAGEIO_MAXALLOC'] = "0"  # disable max image size
 
@@ -21,7 +24,20 @@ from modules.datatypes import (
     Section,
     Transform
 )
-from modules.calc import fieldPointToPixmap
+from modules.calc import (
+    pixmapPointToField,
+    getPanShift,
+    getExposedRects,
+    pixmapRectToField
+)
+
+from .tile_cache import tile_cache
+from .tiff_reader import TiffReader, TiffFileError
+from .render_worker import RenderWorker, render_pool
+
+# shared by every image layer to read the tiles of a view concurrently
+tile_workers = 8
+tile_executor = ThreadPoolExecutor(max_workers=tile_workers)
 
 class ImageLayer():
 
@@ -35,26 +51,67 @@ class ImageLayer():
         self.section = section
         self.series = series
         self.is_zarr_file = self.series.src_dir.endswith(".zarr")
+        # the most recent render request and the last image rendered
+        self.render_id = 0
+        self.rendered_image = None
+        self.levels = None
         self.loadImage()
     
     def loadImage(self):
         """Load the image."""
+        # release the previous image
+        self.close()
+
         # get the image path
         src_path = os.path.join(self.series.src_dir, os.path.basename(self.section.src))
+        self.src_path = src_path
         
         # if the image folder is a zarr file
         if self.is_zarr_file:
             try:
-                self.image = zarr.open(src_path, mode="r")
+                zarr_image = zarr.open(src_path, mode="r")
+                # a zarr group is treated as a multiscale image pyramid
+                if isinstance(zarr_image, zarr.hierarchy.Group):
+                    self.levels = getPyramidLevels(zarr_image)
+                else:
+                    self.levels = [zarr_image]
+                self.image = self.levels[0]
                 self.bh, self.bw = self.image.shape
+                # the x and y downsampling factors for each level
+                self.level_scales = [
+                    (self.bw / level.shape[1], self.bh / level.shape[0])
+                    for level in self.levels
+                ]
                 self.base_corners = [(0, 0), (0, self.bh), (self.bw, self.bh), (self.bw, 0)]
                 self.image_found = True
-            except zarr.errors.PathNotFoundError:
+            except (zarr.errors.PathNotFoundError, IndexError):
+                self.levels = None
                 self.image_found = False
         
         # if saved as normal images
         else:
-            self.image = QImage(src_path)
+            self.levels = None
+            # read large TIFFs by tile
+            if src_path.lower().endswith((".tif", ".tiff")):
+                try:
+                    reader = TiffReader(src_path)
+                    if reader.isSupported():
+                        self.levels = [reader]
+                        self.level_scales = [(1, 1)]
+                        self.bh, self.bw = reader.shape
+                        self.base_corners = [(0, 0), (0, self.bh), (self.bw, self.bh), (self.bw, 0)]
+                        self.image_found = True
+                        return
+                    reader.close()
+                except (OSError, ValueError, TiffFileError):
+                    pass
+            
+            # the whole decoded image is cached as a single tile
+            self.image = tile_cache.get((src_path, 0, None))
+            if self.image is None:
+                self.image = QImage(src_path)
+                if not self.image.isNull():
+                    tile_cache.put((src_path, 0, None), self.image)
             if self.image.isNull():
                 self.image_found = False
             else:
@@ -62,6 +119,16 @@ class ImageLayer():
                 self.base_corners = [(0, 0), (0, self.bh), (self.bw, self.bh), (self.bw, 0)]
                 self.image_found = True
     
+    def close(self):
+        """Close the image files held open by the layer and cancel any render in progress."""
+        self.render_id += 1
+        # the last image is not reused for panning or previews after a reload
+        self.rendered_image = None
+        if self.levels is not None:
+            for level in self.levels:
+                if type(level) is TiffReader:
+                    level.close()
+    
     def setSrcDir(self, src_dir : str):
         """Set the immediate source directory and reload image.
         
@@ -71,42 +138,23 @@ class ImageLayer():
         self.series.src_dir = src_dir
         self.loadImage()
     
-    def _calcTformCorners(self, base_pixmap : QPixmap, tform : Transform) -> tuple:
-        """Calculate the vector for each corner of a transformed image.
+    def _fieldToImage(self, x : float, y : float, tform : Transform, mag : float) -> tuple:
+        """Convert a field point to full resolution image pixel coordinates.
         
             Params:
-                base_pixmap (QPixmap): untransformed image
-                tform (QTransform): transform to apply to the image
+                x (float): the x-coord of the field point
+                y (float): the y-coord of the field point
+                tform (Transform): the section transform
+                mag (float): the section magnification
             Returns:
-                (tuple) the four corners (starting from bottom left moving clockwise)
+                (tuple): the x, y image pixel coordinates
         """
-        base_coords = base_pixmap.size() # base image dimensions
-        height_vector = tform.map(0, base_coords.height()) # create a vector for base height and transform
-        width_vector = tform.map(base_coords.width(), 0) # create a vector for base width and transform
-        # calculate coordinates for the top left corner of image
-        if height_vector[0] < 0:
-            tl_x = -height_vector[0]
-        else:
-            tl_x = 0
-        if width_vector[1] < 0:
-            tl_y = -width_vector[1]
-        else:
-            tl_y = 0
-        tl = (tl_x, tl_y)
-        # calculate coordinates for the bottom left corner of the image
-        bl_x = tl_x + height_vector[0]
-        bl_y = tl_y + height_vector[1]
-        bl = (bl_x, bl_y)
-        # calculate coordinates for top right corner of the image
-        tr_x = tl_x + width_vector[0]
-        tr_y = tl_y + width_vector[1]
-        tr = (tr_x, tr_y)
-        # calculate coordinates for bottom right corner of the image
-        br_x = bl_x + width_vector[0]
-        br_y = bl_y + width_vector[1]
-        br = (br_x, br_y)
-
-        return bl, tl, tr, br
+        # apply inverse transform and divide by image magnification
+        x, y = tform.map(x, y, inverted=True)
+        x /= mag
+        y /= mag
+        # adjust y-coordinate
+        return x, self.bh - y
     
     def changeBrightness(self, change : int):
         """Change the brightness of the section.
@@ -131,83 +179,167 @@ class ImageLayer():
         elif self.section.contrast < -100:
             self.section.contrast = -100
     
-    def _drawBrightness(self, image_layer):
-        """Draw the brightness on the image field.
+    def _getLevel(self, scaling : float) -> int:
+        """Get the coarsest pyramid level that still meets the current scaling.
         
             Params:
-                image_layer (QPixmap): the pixmap to draw brightness on
+                scaling (float): the ratio of screen pixels to full resolution image pixels
+            Returns:
+                (int): the index of the pyramid level
         """
-        # paint to image
-        painter = QPainter(image_layer)
-        rgb = round(self.section.brightness * 255/100)
-        # different modes for high and low brightness
-        if self.section.brightness >= 0:
-            painter.setCompositionMode(QPainter.CompositionMode_Plus)
-            brightness_color = QColor(*([rgb]*3))
-        else:
-            painter.setCompositionMode(QPainter.CompositionMode_Multiply)
-            brightness_color = QColor(*([255+rgb]*3))
-        painter.setPen(QPen(brightness_color, 0))
-        painter.setBrush(brightness_color)
-        painter.drawPolygon(self.bc_poly)
-        painter.end()
+        level = 0
+        for i, (x_scale, y_scale) in enumerate(self.level_scales):
+            # one level pixel should not cover more than one screen pixel
+            if max(x_scale, y_scale) * scaling <= 1:
+                level = i
+        return level
+    
+    def _readTile(self, level : int, ty : int, tx : int) -> np.ndarray:
+        """Read a single tile from the image source.
+        
+            Params:
+                level (int): the pyramid level
+                ty (int): the row index of the tile
+                tx (int): the column index of the tile
+            Returns:
+                (np.ndarray): the decoded tile (None if the image has been closed)
+        """
+        array = self.levels[level]
+        if type(array) is TiffReader:
+            return array.readTile(ty, tx)
+        th, tw = array.chunks
+        return array[ty*th:(ty+1)*th, tx*tw:(tx+1)*tw]
     
-    def _drawContrast(self, image_layer):
-        """Draw the contrast on the image field.
+    def _readCrop(
+        self,
+        level : int,
+        xmin : int,
+        ymin : int,
+        xmax : int,
+        ymax : int,
+        cached_only=False,
+        cancelled=None
+    ) -> np.ndarray:
+        """Assemble a crop of a tiled image level from cached tiles (one tile per chunk).
         
             Params:
-                image_layer (QPixmap): the pixmap to draw contrast on
+                level (int): the pyramid level
+                xmin (int): the left of the crop in level pixels
+                ymin (int): the top of the crop in level pixels
+                xmax (int): the right of the crop in level pixels
+                ymax (int): the bottom of the crop in level pixels
+                cached_only (bool): True if tiles should not be read from the source
+                cancelled (function): returns True if the crop is no longer needed
+            Returns:
+                (np.ndarray): the crop (None if a tile is not cached or the read was cancelled)
         """
-        painter = QPainter(image_layer)
-
-        if self.section.contrast >= 0:
-            overlays = self.section.contrast / 20
-            # overlay image on itself for added contrast
-            painter.setCompositionMode(QPainter.CompositionMode_Overlay)
-            # draw the images n (int) times on itself
-            for _ in range(int(overlays)):
-                painter.drawPixmap(0, 0, image_layer)
-            # draw another transparent image
-            opacity = overlays % 1
-            if opacity > 0:
-                painter.setOpacity(opacity)
-                painter.drawPixmap(0, 0, image_layer)
+        array = self.levels[level]
+        h, w = array.shape
+        th, tw = array.chunks
+        xmax, ymax = min(xmax, w), min(ymax, h)
+
+        # get the cached tiles and read the rest concurrently
+        indexes = self._getTileIndexes(level, xmin, ymin, xmax, ymax)
+        tiles = {}
+        missing = []
+        for index in indexes:
+            tile = tile_cache.get((self.src_path, level, index))
+            if tile is None:
+                missing.append(index)
+            else:
+                tiles[index] = tile
+        if missing:
+            if cached_only or (cancelled and cancelled()):
+                return None
+            tiles.update(self._readTiles(level, missing, cancelled))
+            if len(tiles) < len(indexes):
+                return None
+        
+        crop = np.zeros((ymax - ymin, xmax - xmin), dtype=array.dtype)
+        for (ty, tx), tile in tiles.items():
+            # copy the overlapping part of the tile into the crop
+            x0, y0 = max(xmin, tx*tw), max(ymin, ty*th)
+            x1, y1 = min(xmax, (tx+1)*tw), min(ymax, (ty+1)*th)
+            crop[y0-ymin:y1-ymin, x0-xmin:x1-xmin] = tile[y0-ty*th:y1-ty*th, x0-tx*tw:x1-tx*tw]
+        
+        return crop
+    
+    def _readTiles(self, level : int, indexes : list, cancelled=None) -> dict:
+        """Read whole tiles from the source concurrently and add them to the cache.
+        
+            Params:
+                level (int): the pyramid level
+                indexes (list): the row and column index of each tile
+                cancelled (function): returns True if the tiles are no longer needed
+            Returns:
+                (dict): index : tile for each tile read (tiles skipped after cancelling are missing)
+        """
+        def read(index):
+            if cancelled and cancelled():
+                return None
+            tile = self._readTile(level, *index)
+            if tile is None:  # the layer was closed
+                return None
+            tile_cache.put((self.src_path, level, index), tile)
+            return tile
+        
+        if len(indexes) == 1:
+            tiles = [read(indexes[0])]
         else:
-            # overlay gray on image for decreased contrast
-            opacity = abs(self.section.contrast) / 100
-            painter.setOpacity(opacity)
-            gray = QColor(128, 128, 128)
-            painter.setPen(QPen(gray, 0))
-            painter.setBrush(gray)
-            painter.drawPolygon(self.bc_poly)
-        painter.end()
+            tiles = tile_executor.map(read, indexes)
+        
+        return {
+            index : tile
+            for index, tile in zip(indexes, tiles)
+            if tile is not None
+        }
+    
+    def _getTileIndexes(self, level : int, xmin : int, ymin : int, xmax : int, ymax : int) -> list:
+        """Get the indexes of the tiles that intersect a crop of an image level.
+        
+            Params:
+                level (int): the pyramid level
+                xmin (int): the left of the crop in level pixels
+                ymin (int): the top of the crop in level pixels
+                xmax (int): the right of the crop in level pixels
+                ymax (int): the bottom of the crop in level pixels
+            Returns:
+                (list): the row and column index of each tile
+        """
+        array = self.levels[level]
+        h, w = array.shape
+        th, tw = array.chunks
+        xmax, ymax = min(xmax, w), min(ymax, h)
 
-    def generateImageLayer(self, pixmap_dim : tuple, window : list) -> QPixmap:
-        """Generate the image layer.
+        return [
+            (ty, tx)
+            for ty in range(ymin // th, (ymax - 1) // th + 1)
+            for tx in range(xmin // tw, (xmax - 1) // tw + 1)
+        ]
+    
+    def _getCropArea(self, pixmap_dim : tuple, window : list, tform : Transform, mag : float, level : int = None) -> tuple:
+        """Get the pyramid level and the area of the image needed to render the window.
         
             Params:
                 pixmap_dim (tuple): the w and h of the main window
                 window (list): the x, y, w, and h of the field window
+                tform (Transform): the section transform
+                mag (float): the section magnification
+                level (int): the pyramid level to read from (None to choose from the scaling)
             Returns:
-                image_layer (QPixmap): the image laye
+                (tuple): scaling, level, x and y level scales, and the crop xmin, ymin, xmax, ymax in level pixels (None if nothing in view)
         """
-        # save and unpack window and pixmap values
-        self.pixmap_dim = pixmap_dim
-        self.window = window
-        pixmap_w, pixmap_h = tuple(pixmap_dim)
-        window_x, window_y, window_w, window_h = tuple(window) 
-
-        # return blank if image was not found
         if not self.image_found:
-            blank_pixmap = QPixmap(pixmap_w, pixmap_h)
-            blank_pixmap.fill(Qt.black)
-            return blank_pixmap
+            return None
+        
+        pixmap_w, pixmap_h = tuple(pixmap_dim)
+        window_x, window_y, window_w, window_h = tuple(window)
 
         # scaling: ratio of screen pixels to actual image pixels (should be equal)
-        x_scaling = pixmap_w / (window_w / self.section.mag)
-        y_scaling = pixmap_h / (window_h / self.section.mag)
+        x_scaling = pixmap_w / (window_w / mag)
+        y_scaling = pixmap_h / (window_h / mag)
         assert(abs(x_scaling - y_scaling) < 1e-6)
-        self.scaling = x_scaling
+        scaling = x_scaling
 
         # get vectors for four window corners
         window_corners = [
@@ -216,34 +348,22 @@ class ImageLayer():
             [window_x + window_w, window_y + window_h],
             [window_x + window_w, window_y]
         ]
-        
-        # get transforms
-        tform = self.section.tforms[self.series.alignment]
 
         # convert corners to image pixel coordinates
         for i in range(len(window_corners)):
-            # apply inverse transform to window corners
-            point = window_corners[i]
-            point = list(tform.map(*point, inverted=True))
-            # divide by image magnification
-            point[0] /= self.section.mag
-            point[1] /= self.section.mag
-            # adjust y-coordinate
-            point[1] = self.bh - point[1]
-            window_corners[i] = point
+            window_corners[i] = self._fieldToImage(*window_corners[i], tform, mag)
         
         # get the bounding rectangle for the corners
         xmin, ymin, xmax, ymax = getBoundingRect(window_corners)
-        
-        # calculate the shift in origin
-        origin_shift = [0, 0]
-        origin_shift[0] = window_corners[1][0] - xmin
-        origin_shift[1] = window_corners[1][1] - ymin
 
-        # space to fill if crop falls outside image
-        blank_space = [0, 0]
-        # space to add if crop falls outside image
-        extra_space = [0, 0]
+        # get the pyramid level to read from (tiled sources only)
+        if self.levels is not None:
+            if level is None:
+                level = self._getLevel(scaling)
+            x_scale, y_scale = self.level_scales[level]
+        else:
+            level = 0
+            x_scale, y_scale = 1, 1
 
         # check if requested view is completely out of bounds
         oob = False
@@ -251,37 +371,104 @@ class ImageLayer():
         oob |= xmax <= 0
         oob |= ymin >= self.bh
         oob |= ymax <= 0
-        # return blank pixmap if coords are out of bounds
         if oob:
-            blank_pixmap = QPixmap(pixmap_w, pixmap_h)
-            blank_pixmap.fill(Qt.black)
-            return blank_pixmap
-
-        # trim crop coords to be within image
-        if xmin < 0:
-            blank_space[0] = -xmin
-            xmin = 0
-        if ymin < 0:
-            blank_space[1] = -ymin
-            ymin = 0
-        if xmax > self.bw:
-            extra_space[0] = xmax - self.bw
-            xmax = self.bw
-        if ymax > self.bh:
-            extra_space[1] = ymax - self.bh
-            ymax = self.bh
-
-        # crop image and place in field
-        xmin, ymin, xmax, ymax = tuple(map(int, (xmin, ymin, xmax, ymax)))
-        if self.is_zarr_file:
-            self.zarr_saved = self.image[ymin:ymax, xmin:xmax]
-            im_crop = QImage(
-                self.zarr_saved.data,
-                xmax-xmin,
-                ymax-ymin,
-                self.zarr_saved.strides[0],
-                QImage.Format.Format_Grayscale8
+            return None
+
+        # trim crop coords to be within image and convert to the level pixel grid
+        xmin = max(math.floor(xmin / x_scale), 0)
+        ymin = max(math.floor(ymin / y_scale), 0)
+        xmax = min(math.ceil(xmax / x_scale), math.ceil(self.bw / x_scale))
+        ymax = min(math.ceil(ymax / y_scale), math.ceil(self.bh / y_scale))
+
+        return scaling, level, (x_scale, y_scale), (xmin, ymin, xmax, ymax)
+    
+    def prefetchTiles(self, pixmap_dim : tuple, window : list, tform : Transform, mag : float, max_bytes : int = None, cancelled=None) -> int:
+        """Read the tiles needed to render a window into the tile cache (can be run in a worker thread).
+        
+            Params:
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+                tform (Transform): the section transform
+                mag (float): the section magnification
+                max_bytes (int): stop after reading this many bytes (None if no limit)
+                cancelled (function): returns True if the tiles are no longer needed
+            Returns:
+                (int): the number of bytes read into the cache
+        """
+        # non-tiled images are decoded and cached when loaded
+        if self.levels is None:
+            return 0
+        crop_area = self._getCropArea(pixmap_dim, window, tform, mag)
+        if crop_area is None:
+            return 0
+        scaling, level, (x_scale, y_scale), (xmin, ymin, xmax, ymax) = crop_area
+
+        missing = [
+            index for index in self._getTileIndexes(level, xmin, ymin, xmax, ymax)
+            if not tile_cache.contains((self.src_path, level, index))
+        ]
+
+        # read in batches to stay within the byte limit
+        nbytes = 0
+        for i in range(0, len(missing), tile_workers):
+            if (cancelled and cancelled()) or (max_bytes is not None and nbytes >= max_bytes):
+                break
+            tiles = self._readTiles(level, missing[i:i+tile_workers], cancelled)
+            nbytes += sum(tile.nbytes for tile in tiles.values())
+        
+        return nbytes
+
+    def renderImage(
+        self,
+        pixmap_dim : tuple,
+        window : list,
+        tform : Transform,
+        mag : float,
+        brightness : int,
+        contrast : int,
+        level : int = None,
+        cached_only=False,
+        cancelled=None
+    ) -> np.ndarray:
+        """Render the image pixels seen in the window.
+
+        Does not touch the section or any Qt GUI objects, so it can be run in a worker thread.
+        
+            Params:
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+                tform (Transform): the section transform
+                mag (float): the section magnification
+                brightness (int): the section brightness
+                contrast (int): the section contrast
+                level (int): the pyramid level to read from (None to choose from the scaling)
+                cached_only (bool): True if only tiles already in the cache should be used
+                cancelled (function): returns True if the render is no longer needed
+            Returns:
+                (np.ndarray): the uint8 pixels (None if not cached or cancelled)
+        """
+        pixmap_w, pixmap_h = tuple(pixmap_dim)
+        blank = np.zeros((pixmap_h, pixmap_w), dtype=np.uint8)
+
+        # return blank if image was not found or out of view
+        crop_area = self._getCropArea(pixmap_dim, window, tform, mag, level)
+        if crop_area is None:
+            return blank
+        scaling, level, (x_scale, y_scale), (xmin, ymin, xmax, ymax) = crop_area
+
+        # crop the image
+        if self.levels is not None:
+            crop = self._readCrop(
+                level,
+                xmin,
+                ymin,
+                xmax,
+                ymax,
+                cached_only,
+                cancelled
             )
+            if crop is None:
+                return None
         else:
             crop_rect = QRect(
                 xmin,
@@ -289,62 +476,419 @@ class ImageLayer():
                 xmax-xmin,
                 ymax-ymin
             )
-            im_crop = self.image.copy(crop_rect)
-
-        # make the crop the size of the screen
-        im_scaled = im_crop.scaled(im_crop.width()*self.scaling, im_crop.height()*self.scaling)
-        blank_space[0] *= self.scaling
-        blank_space[1] *= self.scaling
-        extra_space[0] *= self.scaling
-        extra_space[1] *= self.scaling
-        origin_shift[0] *= self.scaling
-        origin_shift[1] *= self.scaling
-
-        # add blank space on each side
-        im_padded = QPixmap(
-            round(blank_space[0] + im_scaled.width() + extra_space[0]),
-            round(blank_space[1] + im_scaled.height() + extra_space[1])
+            crop = qimageToArray(self.image.copy(crop_rect))
+        
+        # average down crops that are much larger than the screen
+        shrink = math.floor(1 / (scaling * max(x_scale, y_scale)))
+        if shrink >= 2:
+            crop_h, crop_w = crop.shape[:2]
+            crop = cv2.resize(
+                crop,
+                (max(round(crop_w / shrink), 1), max(round(crop_h / shrink), 1)),
+                interpolation=cv2.INTER_AREA
+            )
+            # use the actual factors after rounding
+            shrink_x = crop_w / crop.shape[1]
+            shrink_y = crop_h / crop.shape[0]
+        else:
+            shrink_x = shrink_y = 1
+        
+        # apply the brightness and contrast to the crop as a lookup table
+        crop = applyBCLut(crop, brightness, contrast)
+        
+        # get the affine that maps each screen pixel to the crop
+        def screenToCrop(x, y):
+            x, y = pixmapPointToField(x, y, pixmap_dim, window, mag)
+            x, y = self._fieldToImage(x, y, tform, mag)
+            return (
+                (x / x_scale - xmin) / shrink_x,
+                (y / y_scale - ymin) / shrink_y
+            )
+        # (sample at pixel centers)
+        o = screenToCrop(0.5, 0.5)
+        dx = screenToCrop(1.5, 0.5)
+        dy = screenToCrop(0.5, 1.5)
+        screen_to_crop = np.array([
+            [dx[0] - o[0], dy[0] - o[0], o[0] - 0.5],
+            [dx[1] - o[1], dy[1] - o[1], o[1] - 0.5]
+        ])
+
+        # resample only the screen pixels in one pass
+        if scaling * min(x_scale * shrink_x, y_scale * shrink_y) >= 1:
+            interpolation = cv2.INTER_NEAREST
+        else:
+            interpolation = cv2.INTER_LINEAR
+        return cv2.warpAffine(
+            crop,
+            screen_to_crop,
+            (pixmap_w, pixmap_h),
+            flags=interpolation | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=0
         )
-        im_padded.fill(Qt.black)
-        painter = QPainter(im_padded)
-        painter.drawImage(
-            blank_space[0],
-            blank_space[1],
-            im_scaled
+    
+    def _getRenderParams(self, pixmap_dim : tuple, window : list) -> tuple:
+        """Get a snapshot of everything needed to render the image.
+        
+            Params:
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+            Returns:
+                (tuple): the arguments for renderImage
+        """
+        return (
+            tuple(pixmap_dim),
+            tuple(window),
+            self.section.tforms[self.series.alignment].copy(),
+            self.section.mag,
+            self.section.brightness,
+            self.section.contrast
         )
-        painter.end()
-
-        # transform the padded image
-        image_tform = tform.imageTransform()
-        im_tformed = im_padded.transformed(image_tform.getQTransform())
-
-        # transform the origin shift coordinates
-        origin_shift = list(image_tform.map(*origin_shift))
-        # add to top right origin coordinate for transform
-        top_left = self._calcTformCorners(im_padded, image_tform)[1]
-        origin_shift[0] += top_left[0]
-        origin_shift[1] += top_left[1]
-
-        # crop the transformed image to screen dimensions
-        image_layer_rect = QRect(
-            round(origin_shift[0]),
-            round(origin_shift[1]),
-            *pixmap_dim
+    
+    def _renderView(self, params : tuple, previous : tuple, cached_only=False, cancelled=None) -> np.ndarray:
+        """Render the image, reusing the previous image if the view was only panned.
+        
+            Params:
+                params (tuple): the render parameters
+                previous (tuple): the previous image and its render parameters (or None)
+                cached_only (bool): True if only tiles already in the cache should be used
+                cancelled (function): returns True if the render is no longer needed
+            Returns:
+                (np.ndarray): the uint8 pixels (None if not cached or cancelled)
+        """
+        pixmap_dim, window, tform, *bc_params = params
+        shift = None
+        if previous is not None:
+            prev_image, prev_params = previous
+            prev_dim, prev_window, prev_tform, *prev_bc_params = prev_params
+            # only the window position may differ
+            if (
+                prev_dim == pixmap_dim and
+                prev_tform.getList() == tform.getList() and
+                prev_bc_params == bc_params
+            ):
+                shift = getPanShift(pixmap_dim, prev_window, window)
+        if shift is None:
+            return self.renderImage(*params, cached_only=cached_only, cancelled=cancelled)
+        
+        # move the overlapping part of the previous image
+        pixmap_w, pixmap_h = pixmap_dim
+        dx, dy = shift
+        image = np.zeros_like(prev_image)
+        image[max(dy, 0):pixmap_h + min(dy, 0), max(dx, 0):pixmap_w + min(dx, 0)] = (
+            prev_image[max(-dy, 0):pixmap_h + min(-dy, 0), max(-dx, 0):pixmap_w + min(-dx, 0)]
         )
-        image_layer = im_tformed.copy(image_layer_rect)
-
-        # create the brightness/contrast polygon (draws as a polygon over the image)
-        self.bc_poly = QPolygon()
-        for p in self.base_corners:
-            x, y = [n*self.section.mag for n in p]
-            x, y = tform.map(x, y)
-            x, y = fieldPointToPixmap(x, y, self.window, self.pixmap_dim, self.section.mag)
-            self.bc_poly.append(QPoint(x, y))
-        # draw the brightness and contrast
-        self._drawContrast(image_layer)
-        self._drawBrightness(image_layer)
 
+        # render only the newly exposed strips
+        for rect in getExposedRects(pixmap_dim, shift):
+            x, y, w, h = rect
+            strip = self.renderImage(
+                (w, h),
+                pixmapRectToField(rect, pixmap_dim, window),
+                tform,
+                *bc_params,
+                cached_only=cached_only,
+                cancelled=cancelled
+            )
+            if strip is None:
+                return None
+            # color images may be cropped into grayscale strips
+            if strip.shape != image[y:y+h, x:x+w].shape:
+                return self.renderImage(*params, cached_only=cached_only, cancelled=cancelled)
+            image[y:y+h, x:x+w] = strip
+        
+        return image
+    
+    def _setRenderedImage(self, image : np.ndarray, params : tuple) -> QPixmap:
+        """Convert rendered pixels to the image layer and store it for previews and panning.
+        
+            Params:
+                image (np.ndarray): the rendered pixels
+                params (tuple): the render parameters
+            Returns:
+                (QPixmap): the image layer
+        """
+        image_layer = QPixmap.fromImage(arrayToQImage(image))
+        self.rendered_image = (image_layer, image, params)
         return image_layer
+    
+    def _getPrevious(self) -> tuple:
+        """Get the previous image and its render parameters for reuse.
+        
+            Returns:
+                (tuple): the image and render parameters (None if nothing was rendered)
+        """
+        if self.rendered_image is None:
+            return None
+        return self.rendered_image[1:]
+
+    def generateImageLayer(self, pixmap_dim : tuple, window : list) -> QPixmap:
+        """Generate the image layer.
+        
+            Params:
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+            Returns:
+                image_layer (QPixmap): the image laye
+        """
+        # save window and pixmap values
+        self.pixmap_dim = pixmap_dim
+        self.window = window
+        # cancel any render in progress
+        self.render_id += 1
+
+        params = self._getRenderParams(pixmap_dim, window)
+        image = self._renderView(params, self._getPrevious())
+        return self._setRenderedImage(image, params)
+    
+    def requestImageLayer(self, pixmap_dim : tuple, window : list, callback, error_callback=None) -> QPixmap:
+        """Generate the image layer in a worker thread.
+
+        If every tile needed is already cached, the image is rendered immediately.
+        Otherwise, a preview (the previous image moved to the new window over the
+        cached coarsest level) is returned and the full image is delivered to the
+        callback when ready. Requests that are replaced by newer ones are cancelled.
+        
+            Params:
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+                callback (function): slot (on a QObject) called with (layer, render_id, params, image)
+                error_callback (function): slot (on a QObject) called with (exctype, value, traceback, (layer, render_id, params)) if the render fails
+            Returns:
+                (QPixmap): the image layer or its preview
+        """
+        # non-tiled images are already in memory
+        if self.levels is None:
+            return self.generateImageLayer(pixmap_dim, window)
+        
+        # save window and pixmap values
+        self.pixmap_dim = pixmap_dim
+        self.window = window
+        self.render_id += 1
+        render_id = self.render_id
+        params = self._getRenderParams(pixmap_dim, window)
+        previous = self._getPrevious()
+
+        # render immediately if no reading is required
+        image = self._renderView(params, previous, cached_only=True)
+        if image is not None:
+            return self._setRenderedImage(image, params)
+        
+        # render the full image in the background
+        def render(layer, render_id, params):
+            return (
+                layer,
+                render_id,
+                params,
+                layer._renderView(
+                    params,
+                    previous,
+                    cancelled=lambda : render_id != layer.render_id
+                )
+            )
+        worker = RenderWorker(render, self, render_id, params)
+        worker.signals.result.connect(callback)
+        if error_callback:
+            worker.signals.error.connect(error_callback)
+        render_pool.start(worker)
+
+        return self._getPreview(params)
+    
+    def receiveImageLayer(self, render_id : int, params : tuple, image : np.ndarray) -> QPixmap:
+        """Accept an image rendered in the background (main thread only).
+        
+            Params:
+                render_id (int): the id of the render request
+                params (tuple): the render parameters
+                image (np.ndarray): the rendered pixels
+            Returns:
+                (QPixmap): the image layer (None if the render is out of date)
+        """
+        if image is None or render_id != self.render_id:
+            return None
+        return self._setRenderedImage(image, params)
+    
+    def recoverImageLayer(self, render_id : int, params : tuple) -> QPixmap:
+        """Render the image in the main thread after a background render failed.
+        
+            Params:
+                render_id (int): the id of the failed render request
+                params (tuple): the render parameters
+            Returns:
+                (QPixmap): the image layer (None if the render is out of date)
+        """
+        if render_id != self.render_id:
+            return None
+        pixmap_dim, window = params[:2]
+        return self.generateImageLayer(pixmap_dim, window)
+    
+    def _getPreview(self, params : tuple) -> QPixmap:
+        """Get a quick approximation of the image layer from what is already in memory.
+        
+            Params:
+                params (tuple): the render parameters
+            Returns:
+                (QPixmap): the preview
+        """
+        pixmap_dim, window = params[:2]
+        pixmap_w, pixmap_h = pixmap_dim
+        preview = QPixmap(pixmap_w, pixmap_h)
+        preview.fill(Qt.black)
+
+        # start from the coarsest level if it is cached
+        image = self.renderImage(
+            *params,
+            level=len(self.levels) - 1,
+            cached_only=True
+        )
+        if image is not None:
+            preview = QPixmap.fromImage(arrayToQImage(image))
+        
+        # move the previous image into the new window
+        if self.rendered_image is not None:
+            prev_layer, prev_image, prev_params = self.rendered_image
+            prev_window = prev_params[1]
+            window_x, window_y, window_w, window_h = window
+            prev_x, prev_y, prev_w, prev_h = prev_window
+            target = QRectF(
+                (prev_x - window_x) / window_w * pixmap_w,
+                (window_y + window_h - prev_y - prev_h) / window_h * pixmap_h,
+                prev_w / window_w * pixmap_w,
+                prev_h / window_h * pixmap_h
+            )
+            painter = QPainter(preview)
+            painter.drawPixmap(target, prev_layer, QRectF(prev_layer.rect()))
+            painter.end()
+        
+        return preview
+
+def getPyramidLevels(group : zarr.hierarchy.Group) -> list:
+    """Get the arrays of a multiscale zarr group, from full resolution to coarsest.
+    
+            Params:
+                group (zarr.hierarchy.Group): the group containing the levels
+            Returns:
+                (list): the zarr arrays for each level
+    """
+    # use the multiscales metadata if provided
+    if "multiscales" in group.attrs:
+        datasets = group.attrs["multiscales"][0]["datasets"]
+        return [group[d["path"]] for d in datasets]
+    
+    # otherwise, use the arrays named by level number
+    levels = []
+    for name, array in group.arrays():
+        if name.isnumeric():
+            levels.append((int(name), array))
+    levels.sort(key=lambda x : x[0])
+    
+    return [array for n, array in levels]
+
+@lru_cache(maxsize=64)
+def getBCLut(brightness : int, contrast : int, bits : int = 8) -> np.ndarray:
+    """Get the lookup table that applies brightness and contrast to a grayscale value.
+
+    The table reproduces the previous painter passes: the image overlaid on itself
+    once per 20 contrast (plus a partially transparent pass for the remainder) or
+    blended with gray for negative contrast, followed by an additive or
+    multiplicative brightness fill.
+    
+            Params:
+                brightness (int): the brightness of the section (-100 to 100)
+                contrast (int): the contrast of the section (-100 to 100)
+                bits (int): the bit depth of the input (8 or 16)
+            Returns:
+                (np.ndarray): the uint8 lookup table (2^bits entries)
+    """
+    x = np.arange(2**bits, dtype=np.float64)
+    if bits != 8:
+        x = np.round(x * 255 / (2**bits - 1))
+    
+    def overlay(x):
+        x = x / 255
+        y = np.where(x < 0.5, 2*x*x, 1 - 2*(1-x)*(1-x))
+        return np.round(y * 255)
+    
+    # contrast
+    if contrast >= 0:
+        overlays = contrast / 20
+        for _ in range(int(overlays)):
+            x = overlay(x)
+        opacity = overlays % 1
+        if opacity > 0:
+            x = np.round(x + (overlay(x) - x) * opacity)
+    else:
+        opacity = abs(contrast) / 100
+        x = np.round(x + (128 - x) * opacity)
+    
+    # brightness
+    rgb = round(brightness * 255/100)
+    if brightness >= 0:
+        x = x + rgb
+    else:
+        x = np.round(x * (255 + rgb) / 255)
+    
+    return np.clip(x, 0, 255).astype(np.uint8)
+
+def applyBCLut(arr : np.ndarray, brightness : int, contrast : int) -> np.ndarray:
+    """Apply brightness and contrast to an 8-bit or 16-bit image (returns an 8-bit image).
+    
+            Params:
+                arr (np.ndarray): the image pixels
+                brightness (int): the brightness of the section
+                contrast (int): the contrast of the section
+            Returns:
+                (np.ndarray): the adjusted uint8 image
+    """
+    if arr.dtype == np.uint8:
+        if brightness == 0 and contrast == 0:
+            return arr
+        return cv2.LUT(arr, getBCLut(brightness, contrast))
+    else:
+        lut = getBCLut(brightness, contrast, 16)
+        return lut[arr.astype(np.uint16, copy=False)]
+
+def qimageToArray(image : QImage) -> np.ndarray:
+    """Convert a QImage to a numpy array (grayscale or RGB).
+    
+            Params:
+                image (QImage): the image to convert
+            Returns:
+                (np.ndarray): the image pixels
+    """
+    if image.isGrayscale():
+        image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+        channels = 1
+    else:
+        image = image.convertToFormat(QImage.Format.Format_RGB888)
+        channels = 3
+    w, h = image.width(), image.height()
+    arr = np.frombuffer(image.constBits(), np.uint8)
+    arr = arr.reshape(h, image.bytesPerLine())[:, :w*channels]
+    if channels == 3:
+        arr = arr.reshape(h, w, 3)
+    
+    return arr.copy()
+
+def arrayToQImage(arr : np.ndarray) -> QImage:
+    """Wrap a grayscale or RGB numpy array in a QImage (does NOT copy the data).
+    
+            Params:
+                arr (np.ndarray): the image pixels
+            Returns:
+                (QImage): the image
+    """
+    if arr.ndim == 3:
+        image_format = QImage.Format.Format_RGB888
+    else:
+        image_format = QImage.Format.Format_Grayscale8
+    return QImage(
+        arr.data,
+        arr.shape[1],
+        arr.shape[0],
+        arr.strides[0],
+        image_format
+    )
 
 def getBoundingRect(points : list):
     """Get the bounding rectangle and shift in origin for a set of points.
@@ -0,0 +1,185 @@
+import os
+import threading
+import traceback
+
+from modules.datatypes import Series
+
+from .image_layer import ImageLayer
+from .tile_cache import tile_cache
+
+class Prefetcher():
+
+    def __init__(self, max_bytes : int):
+        """Create a background loader that warms the section data and image tiles likely to be viewed next.
+
+        Only the most recent request is kept: a new request replaces any request
+        that has not started and cancels the one in progress (between tiles).
+
+            Params:
+                max_bytes (int): the max number of tile bytes read per request
+        """
+        self.max_bytes = max_bytes
+        self.job = None
+        self.job_id = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        # the image layers of the prefetched sections (worker thread only)
+        self.layers = {}  # snum : layer
+
+    def _start(self):
+        """Start the worker thread if it is not running (lock must be held)."""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        """Run the requests (worker thread)."""
+        while True:
+            with self.condition:
+                while self.job is None:
+                    self.condition.wait()
+                fn = self.job
+                job_id = self.job_id
+                self.job = None
+            try:
+                fn(lambda : job_id != self.job_id)
+            except Exception:
+                traceback.print_exc()
+
+    def _request(self, fn):
+        """Replace the current request.
+
+            Params:
+                fn (function): the job to run (called with a function that returns True if cancelled)
+        """
+        with self.condition:
+            self.job_id += 1
+            self.job = fn
+            self._start()
+            self.condition.notify()
+
+    def _getLayer(self, series : Series, section) -> ImageLayer:
+        """Get the image layer for a section, reusing the one from a previous request (worker thread only).
+
+            Params:
+                series (Series): the series object
+                section (Section): the section object
+            Returns:
+                (ImageLayer): the image layer
+        """
+        layer = self.layers.get(section.n)
+        src_path = os.path.join(series.src_dir, os.path.basename(section.src))
+        if layer is not None and layer.series is series and layer.src_path == src_path:
+            layer.section = section
+            return layer
+        if layer is not None:
+            layer.close()
+        layer = ImageLayer(section, series)
+        self.layers[section.n] = layer
+        return layer
+    
+    def _closeLayers(self, keep : list = ()):
+        """Close the image layers that are no longer needed (worker thread only).
+
+            Params:
+                keep (list): the section numbers of the layers to keep
+        """
+        for snum in list(self.layers):
+            if snum not in keep:
+                self.layers.pop(snum).close()
+
+    def _getMaxBytes(self) -> int:
+        """Get the tile budget for a request (never more than half of the tile cache)."""
+        return min(self.max_bytes, tile_cache.max_bytes // 2)
+
+    def cancel(self):
+        """Cancel any pending or running request (and release the images of the prefetched sections)."""
+        self._request(lambda cancelled : self._closeLayers())
+
+    def prefetchSections(self, series : Series, pixmap_dim : tuple, window : list, exclude : list = None):
+        """Warm the sections around the current section (and their image tiles for the current window).
+
+        The number of sections on each side is set by series.options["prefetch_depth"].
+
+            Params:
+                series (Series): the series object
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+                exclude (list): the section numbers that are already loaded
+        """
+        depth = series.options["prefetch_depth"]
+        if not depth:
+            return
+        section_numbers = sorted(series.sections.keys())
+        if series.current_section not in section_numbers:
+            return
+        i = section_numbers.index(series.current_section)
+
+        # nearest sections first, alternating sides
+        neighbors = []
+        for d in range(1, depth + 1):
+            for j in (i + d, i - d):
+                if 0 <= j < len(section_numbers):
+                    neighbors.append(section_numbers[j])
+        if exclude:
+            neighbors = [n for n in neighbors if n not in exclude]
+
+        pixmap_dim = tuple(pixmap_dim)
+        window = tuple(window)
+        alignment = series.alignment
+
+        def job(cancelled):
+            # release the images of the sections that are no longer nearby
+            self._closeLayers(neighbors)
+            # load the section data first (most important for stepping)
+            for n in neighbors:
+                if cancelled():
+                    return
+                series.preloadSection(n)
+            # warm the image tiles for the same window
+            max_bytes = self._getMaxBytes()
+            for n in neighbors:
+                if cancelled() or max_bytes <= 0:
+                    return
+                section = series.getCachedSection(n)
+                if section is None:
+                    continue
+                layer = self._getLayer(series, section)
+                max_bytes -= layer.prefetchTiles(
+                    pixmap_dim,
+                    window,
+                    section.tforms[alignment].copy(),
+                    section.mag,
+                    max_bytes,
+                    cancelled
+                )
+
+        self._request(job)
+
+    def prefetchView(self, layer : ImageLayer, pixmap_dim : tuple, window : list):
+        """Warm the image tiles for a window of an image layer (e.g. ahead of a pan).
+
+            Params:
+                layer (ImageLayer): the image layer
+                pixmap_dim (tuple): the w and h of the main window
+                window (list): the x, y, w, and h of the field window
+        """
+        pixmap_dim = tuple(pixmap_dim)
+        window = tuple(window)
+        tform = layer.section.tforms[layer.series.alignment].copy()
+        mag = layer.section.mag
+
+        def job(cancelled):
+            layer.prefetchTiles(
+                pixmap_dim,
+                window,
+                tform,
+                mag,
+                self._getMaxBytes(),
+                cancelled
+            )
+
+        self._request(job)
+
+# shared by every field in the process
+prefetcher = Prefetcher(256 * 1024**2)
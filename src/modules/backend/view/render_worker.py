@@ -0,0 +1,52 @@
+import sys
+import traceback
+
+from PySide6.QtCore import (
+    QRunnable,
+    Slot,
+    Signal,
+    QObject,
+    QThreadPool
+)
+
+class RenderWorkerSignals(QObject):
+    """Signals emitted by a render worker.
+    
+        result: the object returned by the render function
+        error: tuple (exctype, value, traceback.format_exc(), args)
+    """
+    result = Signal(object)
+    error = Signal(tuple)
+
+class RenderWorker(QRunnable):
+
+    def __init__(self, fn, *args):
+        """Create a worker that runs a render function in the thread pool.
+
+        Signals must be connected to a method of a QObject living in the main
+        thread so that the result is delivered on the main thread.
+        
+            Params:
+                fn (function): the function to run
+                args: the arguments for the function
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = RenderWorkerSignals()
+    
+    @Slot()
+    def run(self):
+        """Run the function and emit the result."""
+        try:
+            result = self.fn(*self.args)
+        except:
+            traceback.print_exc()
+            exctype, value = sys.exc_info()[:2]
+            self.signals.error.emit((exctype, value, traceback.format_exc(), self.args))
+        else:
+            self.signals.result.emit(result)
+
+# shared by every image layer (kept small so stale renders do not pile up)
+render_pool = QThreadPool()
+render_pool.setMaxThreadCount(2)
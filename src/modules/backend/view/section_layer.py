@@ -28,7 +28,10 @@ class SectionLayer(ImageLayer, TraceLayer):
         generate_image=True,
         generate_traces=True,
         hide_traces=False,
-        show_all_traces=False
+        show_all_traces=False,
+        image_callback=None,
+        image_error_callback=None,
+        pan=False
         ):
         """Generate the pixmap view for the section.
         
@@ -37,13 +40,24 @@ class SectionLayer(ImageLayer, TraceLayer):
                 window (list): the x, y, w, h of the field view
                 generate_image (bool): whether or not to regenerate the image
                 generate_traces (bool): whether or not to regenerate the traces
+                image_callback (function): if provided, the image is rendered in the background and sent to this slot
+                image_error_callback (function): slot called if the background render fails
+                pan (bool): True if the window was only panned (the traces are unchanged)
         """
         # set the series screen mag
         self.series.screen_mag = window[2] / pixmap_dim[0]
 
         # generate image
         if generate_image:
-            self.image_layer = self.generateImageLayer(pixmap_dim, window)
+            if image_callback:
+                self.image_layer = self.requestImageLayer(
+                    pixmap_dim,
+                    window,
+                    image_callback,
+                    image_error_callback
+                )
+            else:
+                self.image_layer = self.generateImageLayer(pixmap_dim, window)
         
         # if user requests traces to be hidden
         if hide_traces:
@@ -54,7 +68,8 @@ class SectionLayer(ImageLayer, TraceLayer):
                 pixmap_dim,
                 window,
                 show_all_traces,
-                generate_image
+                generate_image,
+                pan
             )
         
         # combine pixmaps
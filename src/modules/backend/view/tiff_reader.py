@@ -0,0 +1,112 @@
+import threading
+import numpy as np
+import tifffile
+from tifffile import TiffFileError
+
+class TiffReader():
+
+    # tile shape used for memory-mapped images
+    memmap_tile_shape = (1024, 1024)
+    # the range of rows in a tile of grouped strips (about one megapixel per tile)
+    strip_tile_rows = (256, 1024)
+
+    def __init__(self, fp : str):
+        """Open a TIFF file for reading individual tiles or strips.
+
+            Params:
+                fp (str): the file path for the TIFF
+        """
+        self.tif = tifffile.TiffFile(fp)
+        self.page = self.tif.pages[0]
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self.shape = self.page.shape[:2]
+        self.dtype = self.page.dtype
+
+        # memory-map uncompressed, contiguous images
+        self.memmap = None
+        self.is_memmap = self.page.is_memmappable
+        if self.is_memmap:
+            self.memmap = tifffile.memmap(fp, page=0, mode="r")
+            self.chunks = TiffReader.memmap_tile_shape
+        elif self.page.is_tiled:
+            self.chunks = (self.page.tilelength, self.page.tilewidth)
+        else:
+            # group consecutive strips into tiles (a strip can be as short as one row)
+            rows = min(self.page.rowsperstrip, self.shape[0])
+            min_rows, max_rows = TiffReader.strip_tile_rows
+            th, tw = TiffReader.memmap_tile_shape
+            tile_rows = min(max(th * tw // self.shape[1], min_rows), max_rows)
+            self.strips_per_tile = max(1, tile_rows // rows)
+            self.chunks = (min(rows * self.strips_per_tile, self.shape[0]), self.shape[1])
+
+    def isSupported(self) -> bool:
+        """Return True if the image can be read by tile (8-bit grayscale only)."""
+        return (
+            self.page.samplesperpixel == 1 and
+            self.page.dtype == np.uint8 and
+            len(self.page.shape) == 2
+        )
+
+    def readTile(self, ty : int, tx : int) -> np.ndarray:
+        """Read and decode a single tile (or group of strips) of the image.
+
+            Params:
+                ty (int): the row index of the tile
+                tx (int): the column index of the tile
+            Returns:
+                (np.ndarray): the decoded tile (None if the file has been closed)
+        """
+        th, tw = self.chunks
+
+        # slice directly from the memory map
+        if self.is_memmap:
+            memmap = self.memmap
+            if memmap is None:
+                return None
+            return np.array(memmap[ty*th:(ty+1)*th, tx*tw:(tx+1)*tw])
+
+        # locate the segments
+        if self.page.is_tiled:
+            tiles_across = -(-self.shape[1] // tw)
+            indexes = [ty * tiles_across + tx]
+        else:
+            first = ty * self.strips_per_tile
+            last = min(first + self.strips_per_tile, len(self.page.dataoffsets))
+            indexes = range(first, last)
+        with self.lock:
+            if self.closed:
+                return None
+            fh = self.tif.filehandle
+            segments = []
+            for index in indexes:
+                fh.seek(self.page.dataoffsets[index])
+                segments.append(fh.read(self.page.databytecounts[index]))
+
+        # decode the segments
+        decoded = []
+        for index, data in zip(indexes, segments):
+            segment, _, shape = self.page.decode(
+                data,
+                index,
+                jpegtables=self.page.jpegtables
+            )
+            if segment is None:  # empty segment
+                segment = np.zeros((shape[-3], shape[-2]), dtype=self.dtype)
+            else:
+                segment = segment.reshape(shape[-3], shape[-2])
+            decoded.append(segment)
+        tile = decoded[0] if len(decoded) == 1 else np.concatenate(decoded)
+
+        # trim padding from edge tiles
+        return tile[:self.shape[0] - ty*th, :self.shape[1] - tx*tw]
+
+    def close(self):
+        """Close the TIFF file (tiles being read in other threads are not returned)."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.memmap = None
+            self.tif.close()
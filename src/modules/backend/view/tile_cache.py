@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+class TileCache():
+
+    def __init__(self, max_bytes : int):
+        """Create a least-recently-used cache for decoded image tiles.
+
+        Tiles are keyed by (source path, pyramid level, tile index).
+
+            Params:
+                max_bytes (int): the memory budget for the cache
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.tiles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key : tuple):
+        """Get a tile from the cache.
+
+            Params:
+                key (tuple): the source path, level, and tile index
+            Returns:
+                the tile (None if not cached)
+        """
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+            return tile
+
+    def put(self, key : tuple, tile):
+        """Add a tile to the cache (evicts the least recently used tiles if over budget).
+
+            Params:
+                key (tuple): the source path, level, and tile index
+                tile: the decoded tile (numpy array or QImage)
+        """
+        size = getTileSize(tile)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.tiles:
+                self.nbytes -= getTileSize(self.tiles.pop(key))
+            self.tiles[key] = tile
+            self.nbytes += size
+            self._evict()
+
+    def contains(self, key : tuple) -> bool:
+        """Check if a tile is in the cache (does not count as a use).
+
+            Params:
+                key (tuple): the source path, level, and tile index
+        """
+        with self.lock:
+            return key in self.tiles
+
+    def setMaxBytes(self, max_bytes : int):
+        """Set the memory budget for the cache.
+
+            Params:
+                max_bytes (int): the new memory budget
+        """
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self, src_path : str = None):
+        """Remove tiles from the cache.
+
+            Params:
+                src_path (str): only remove tiles from this source (all tiles if None)
+        """
+        with self.lock:
+            if src_path is None:
+                self.tiles.clear()
+                self.nbytes = 0
+                return
+            for key in list(self.tiles.keys()):
+                if key[0] == src_path:
+                    self.nbytes -= getTileSize(self.tiles.pop(key))
+
+    def _evict(self):
+        """Remove the least recently used tiles until within budget (lock must be held)."""
+        while self.nbytes > self.max_bytes and self.tiles:
+            key, tile = self.tiles.popitem(last=False)
+            self.nbytes -= getTileSize(tile)
+
+def getTileSize(tile) -> int:
+    """Get the number of bytes used by a tile.
+
+        Params:
+            tile: the numpy array or QImage
+    """
+    if hasattr(tile, "nbytes"):
+        return tile.nbytes
+    else:
+        return tile.sizeInBytes()
+
+# shared by every image layer in the process
+tile_cache = TileCache(1024**3)
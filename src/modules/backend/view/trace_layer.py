@@ -1,12 +1,16 @@
 import math
 
-from PySide6.QtCore import Qt, QPoint, QLine
+from PySide6.QtCore import Qt, QPoint, QPointF, QLine
 from PySide6.QtGui import (
     QPixmap,
     QPen,
     QColor,
     QPainter,
-    QBrush
+    QPainterPath,
+    QPolygonF,
+    QTransform,
+    QBrush,
+    QRegion
 )
 from modules.datatypes import (
     Series, 
@@ -24,7 +28,10 @@ from modules.calc import (
     pointInPoly,
     pixmapPointToField,
     fieldPointToPixmap,
-    getDistanceFromTrace
+    fieldPointsToPixmap,
+    getDistanceFromTrace,
+    getPanShift,
+    getExposedRects
 )
 from modules.gui.utils import notify
 
@@ -41,6 +48,13 @@ class TraceLayer():
         self.series = series
         self.traces_in_view = []
         self.zsegments_in_view = []
+        # the last trace layer drawn and its view (for panning)
+        self.drawn_trace_layer = None
+        # id(trace) : (trace, points, tform, closed, path in field coordinates)
+        self.trace_paths = {}
+        # what the last trace layer shows (for redrawing only the traces that changed)
+        self.drawn_frame = None
+        self.drawn_traces = {}  # id(trace) : (trace, state, bounds on the screen)
     
     def pointToPix(self, pt : tuple, apply_tform=True, qpoint=False) -> tuple:
         """Return the pixel point corresponding to a field point.
@@ -65,19 +79,32 @@ class TraceLayer():
         
         return new_pt
     
-    def traceToPix(self, trace : Trace, qpoints=False) -> list:
+    def traceToPix(self, trace : Trace, qpoints=False, simplify=False) -> list:
         """Return the set of pixel points corresponding to a trace.
         
             Params:
                 trace (Trace): the trace to convert
                 qpoints (bool): True if points should be converted QPoint
+                simplify (bool): True if points closer than half a screen pixel to the trace can be left out
             Returns:
                 (list): list of pixel points
         """
-        new_pts = []
-        for point in trace.points:
-            new_pts.append(self.pointToPix(point, qpoint=qpoints))
-        return new_pts
+        tform = self.section.tforms[self.series.alignment]
+        scale = tform.getScale()
+        if simplify and self.series.screen_mag > 0 and scale > 0:
+            points = trace.getSimplifiedPoints(self.series.screen_mag / 2 / scale)
+        else:
+            points = trace.getPointArray()
+        pix_points = fieldPointsToPixmap(
+            tform.mapArray(points),
+            self.window,
+            self.pixmap_dim,
+            self.section.mag
+        ).tolist()
+        if qpoints:
+            return [QPoint(x, y) for x, y in pix_points]
+        else:
+            return list(map(tuple, pix_points))
     
     def getTrace(self, pix_x : float, pix_y : float) -> Trace:
         """"Return the closest trace to the given field coordinates.
@@ -115,9 +142,18 @@ class TraceLayer():
         # convert the pix_poly into its exterior
         pix_poly = getExterior(pix_poly)
 
+        # only check traces in the view that are near the polygon (pixmap y is flipped)
+        pix_x = [p[0] for p in pix_poly]
+        pix_y = [p[1] for p in pix_poly]
+        xmin, ymin = pixmapPointToField(min(pix_x), max(pix_y), self.pixmap_dim, self.window, self.section.mag)
+        xmax, ymax = pixmapPointToField(max(pix_x), min(pix_y), self.pixmap_dim, self.window, self.section.mag)
+        near_traces = self.section.getTracesInBounds((xmin, ymin, xmax, ymax))
+        in_view = set(id(trace) for trace in self.traces_in_view)
+
         traces_in_poly = []
-        # only check traces in the view
-        for trace in self.traces_in_view:
+        for trace in near_traces:
+            if id(trace) not in in_view:
+                continue
             pix_points = self.traceToPix(trace)
             inside_poly = True
             # check if EVERY point is inside the polygon
@@ -197,10 +233,11 @@ class TraceLayer():
 
         # get the points
         tform = self.section.tforms[self.series.alignment]
-        for point in pix_trace:
-            field_point = pixmapPointToField(point[0], point[1], self.pixmap_dim, self.window, self.section.mag)
-            rtform_point = tform.map(*field_point, inverted=True) # apply the inverse tform to fix trace to base image
-            new_trace.add(rtform_point)
+        field_points = [
+            pixmapPointToField(point[0], point[1], self.pixmap_dim, self.window, self.section.mag)
+            for point in pix_trace
+        ]
+        new_trace.points = tform.map(field_points, inverted=True) # apply the inverse tform to fix trace to base image
         
         # add the trace to the section and select
         if log_message:
@@ -224,11 +261,8 @@ class TraceLayer():
         # create new stamp trace
         tform = self.section.tforms[self.series.alignment]
         new_trace = trace.copy()
-        new_trace.points = []
-        for point in trace.points:
-            field_point = (point[0] + field_x, point[1] + field_y)
-            rtform_point = tform.map(*field_point, inverted=True)  # fix the coords to image
-            new_trace.add(rtform_point)
+        field_points = trace.getPointArray() + (field_x, field_y)
+        new_trace.points = tform.mapArray(field_points, inverted=True)  # fix the coords to image
         self.section.addTrace(new_trace)
         self.section.selected_traces.append(new_trace)
     
@@ -312,7 +346,7 @@ class TraceLayer():
         for trace in self.section.selected_traces:
             trace = trace.copy()
             tform = self.section.tforms[self.series.alignment]
-            trace.points = [tform.map(*p) for p in trace.points]
+            trace.points = tform.map(trace.points)
             copied_traces.append(trace)
         
         if cut:
@@ -329,7 +363,7 @@ class TraceLayer():
         for trace in traces:
             trace = trace.copy()
             tform = self.section.tforms[self.series.alignment]
-            trace.points = [tform.map(*p, inverted=True) for p in trace.points]
+            trace.points = tform.map(trace.points, inverted=True)
             self.section.addTrace(trace, f"copied/pasted")
             self.section.selected_traces.append(trace)
     
@@ -349,92 +383,199 @@ class TraceLayer():
             mode=mode
         )
     
-    def _drawTrace(self, trace_layer : QPixmap, trace : Trace) -> bool:
+    def getViewTransform(self) -> QTransform:
+        """Get the transform from field coordinates to pixmap coordinates for the current view.
+        
+            Returns:
+                (QTransform): the view transform
+        """
+        pixmap_w, pixmap_h = tuple(self.pixmap_dim)
+        window_x, window_y, window_w, window_h = tuple(self.window)
+        scale = pixmap_w / window_w
+        return QTransform(scale, 0, 0, -scale, -window_x * scale, pixmap_h + window_y * scale)
+    
+    def getTracePath(self, trace : Trace) -> QPainterPath:
+        """Get the path of a trace in field coordinates at the level of detail for the zoom.
+
+        The path is kept until the trace points, the section transform, or the
+        level of detail changes.
+        
+            Params:
+                trace (Trace): the trace
+            Returns:
+                (QPainterPath): the path
+        """
+        tform = self.section.tforms[self.series.alignment]
+        scale = tform.getScale()
+        if self.series.screen_mag > 0 and scale > 0:
+            points = trace.getSimplifiedPoints(self.series.screen_mag / 2 / scale)
+        else:
+            points = trace.getPointArray()
+        
+        cached = self.trace_paths.get(id(trace))
+        if cached is not None:
+            cached_trace, cached_points, cached_tform, closed, path = cached
+            if (
+                cached_trace is trace and
+                cached_points is points and
+                cached_tform == tform.tform and
+                closed == trace.closed
+            ):
+                return path
+        
+        path = QPainterPath()
+        path.addPolygon(QPolygonF([QPointF(x, y) for x, y in tform.mapArray(points).tolist()]))
+        if trace.closed:
+            path.closeSubpath()
+        self.trace_paths[id(trace)] = (trace, points, tform.getList(), trace.closed, path)
+        return path
+    
+    def getTraceBounds(self, trace : Trace, view_tform : QTransform) -> tuple:
+        """Get the bounds of a trace on the screen.
+        
+            Params:
+                trace (Trace): the trace
+                view_tform (QTransform): the view transform
+            Returns:
+                (tuple): xmin, ymin, xmax, ymax in pixmap coordinates
+        """
+        rect = view_tform.mapRect(self.getTracePath(trace).controlPointRect())
+        return rect.left(), rect.top(), rect.right(), rect.bottom()
+    
+    def getFrameState(self, show_all_traces : bool) -> tuple:
+        """Get everything other than the traces that affects the trace layer.
+        
+            Params:
+                show_all_traces (bool): True if all traces are displayed regardless of hidden status
+            Returns:
+                (tuple): the state (compare with the state for the last layer)
+        """
+        ztraces = []
+        if self.series.options["show_ztraces"]:
+            for ztrace in self.series.ztraces.values():
+                if ztrace not in self.section.temp_hide:
+                    ztraces.append((id(ztrace), tuple(ztrace.color), tuple(ztrace.points)))
+        selected_ztraces = [
+            (id(ztrace), ztrace.points[i])
+            for ztrace, i in self.section.selected_ztraces
+            if ztrace not in self.section.temp_hide
+        ]
+        return (
+            tuple(self.pixmap_dim),
+            tuple(self.window),
+            show_all_traces,
+            self.series.options["fill_opacity"],
+            tuple(self.section.tforms[self.series.alignment].getList()),
+            tuple(ztraces),
+            tuple(selected_ztraces)
+        )
+    
+    def getDirtyRect(self, old_traces : dict, new_traces : dict) -> tuple:
+        """Get the rectangle covering every trace that was added, removed, or changed since the last layer.
+
+        Traces are matched by identity, so a removed trace is found without comparing points.
+        
+            Params:
+                old_traces (dict): id(trace) : (trace, state, bounds) for the last layer
+                new_traces (dict): id(trace) : (trace, state, bounds) for the new layer
+            Returns:
+                (tuple): x, y, w, h of the rectangle in pixmap coordinates (None if nothing changed)
+        """
+        changed = []
+        for key, (trace, state, bounds) in old_traces.items():
+            new = new_traces.get(key)
+            if new is None or new[0] is not trace or not isSameState(new[1], state):
+                changed.append(bounds)
+        for key, (trace, state, bounds) in new_traces.items():
+            old = old_traces.get(key)
+            if old is None or old[0] is not trace or not isSameState(old[1], state):
+                changed.append(bounds)
+        if not changed:
+            return None
+        
+        # allow for the highlight width and rounding
+        pixmap_w, pixmap_h = tuple(self.pixmap_dim)
+        xmin = max(math.floor(min(b[0] for b in changed)) - 8, 0)
+        ymin = max(math.floor(min(b[1] for b in changed)) - 8, 0)
+        xmax = min(math.ceil(max(b[2] for b in changed)) + 8, pixmap_w)
+        ymax = min(math.ceil(max(b[3] for b in changed)) + 8, pixmap_h)
+        if xmin >= xmax or ymin >= ymax:
+            return None
+        return xmin, ymin, xmax - xmin, ymax - ymin
+    
+    def _drawTrace(self, painter : QPainter, trace : Trace, selected : bool, exposed : list = None) -> bool:
         """Draw a trace on the current trace layer and return bool indicating if trace is in the current view.
         
             Params:
-                trace_layer (QPixmap): the pixmap to draw the traces
+                painter (QPainter): the painter for the trace layer (with the view transform set)
                 trace (Trace): the trace to draw on the pixmap
+                selected (bool): True if the trace is selected
+                exposed (list): only draw within these rectangles (x, y, w, h) if provided
             Returns:
                 (bool) if the trace is within the current field window view
-        """        
-        # convert to screen coordinates
-        qpoints = self.traceToPix(trace, qpoints=True)
-        if not qpoints:
+        """
+        if not trace.getPointCount():
             print("EMPTY TRACE DETECTED")
             return
-
-        # get the bounds
-        xmin = qpoints[0].x()
-        xmax = xmin
-        ymin = qpoints[0].y()
-        ymax = ymin
-        for p in qpoints[1:]:
-            x = p.x()
-            y = p.y()
-            if x < xmin:
-                xmin = x
-            elif x > xmax:
-                xmax = x
-            if y < ymin:
-                ymin = y
-            elif y > ymax:
-                ymax = y
-        
-        trace_bounds = xmin, ymin, xmax, ymax
+        
+        # get the bounds on the screen
+        path = self.getTracePath(trace)
+        trace_bounds = self.getTraceBounds(trace, painter.transform())
+        xmin, ymin, xmax, ymax = trace_bounds
         screen_bounds = 0, 0, *self.pixmap_dim
 
         # draw if within view
         if boundsOverlap(trace_bounds, screen_bounds):
-            # set up painter
-            painter = QPainter(trace_layer)
-            painter.setPen(QPen(QColor(*trace.color), 1))
+            # skip traces that do not reach the exposed areas (allow for highlight width)
+            if exposed is not None:
+                padded_bounds = xmin - 8, ymin - 8, xmax + 8, ymax + 8
+                if not any(boundsOverlap(padded_bounds, (x, y, x+w, y+h)) for x, y, w, h in exposed):
+                    return True
+            painter.save()
+            color = QColor(*trace.color)
 
-            # draw trace
-            if trace.closed:
-                painter.drawPolygon(qpoints)
-            else:
-                painter.drawPolyline(qpoints)
+            # draw trace (pen widths are in screen pixels)
+            painter.setPen(getCosmeticPen(color, 1))
+            painter.drawPath(path)
             
             # draw highlight
-            if trace in self.section.selected_traces:
-                painter.setPen(QPen(QColor(*trace.color), 8))
+            if selected:
+                painter.setPen(getCosmeticPen(color, 8))
                 painter.setOpacity(0.4)
-                if trace.closed:
-                    painter.drawPolygon(qpoints)
-                else:
-                    painter.drawPolyline(qpoints)
+                painter.drawPath(path)
             
             # determine if user requested fill
             if (
                 (trace.closed) and
                 (trace.fill_mode[0] != "none") and
-                ((trace.fill_mode[1] == "selected") == (trace in self.section.selected_traces))
+                ((trace.fill_mode[1] == "selected") == selected)
             ): fill = True
             else: fill = False
 
             # fill in shape if requested
             if fill:
-                painter.setPen(QPen(QColor(*trace.color), 1))
-                painter.setBrush(QBrush(QColor(*trace.color)))
+                painter.setPen(getCosmeticPen(color, 1))
+                painter.setBrush(QBrush(color))
                 # determine the type of fill
                 if trace.fill_mode[0] == "transparent":  # transparent fill
                     painter.setOpacity(self.series.options["fill_opacity"])
                 elif trace.fill_mode[0] == "solid":  # solid
                     painter.setOpacity(1)
-                painter.drawPolygon(qpoints)
-        
+                painter.drawPath(path)
+            
+            painter.restore()
             return True
 
         else:
             return False
     
-    def _drawZtrace(self, trace_layer : QPixmap, ztrace : Ztrace):
+    def _drawZtrace(self, trace_layer : QPixmap, ztrace : Ztrace, exposed : list = None):
         """Draw points on the current trace layer.
         
             Params:
                 trace_layer (QPixmap): the pixmap to draw the point
-                points (list): the list of points to draw
+                ztrace (Ztrace): the ztrace to draw
+                exposed (list): only draw within these rectangles (x, y, w, h) if provided
         """
         points, lines = ztrace.getSectionData(self.series, self.section)
         # convert to screen coordinates
@@ -461,6 +602,8 @@ class TraceLayer():
         
         # set up painter
         painter = QPainter(trace_layer)
+        if exposed is not None:
+            painter.setClipRegion(getRegion(exposed))
         painter.setPen(QPen(QColor(*ztrace.color), 6))
 
         # draw points and lines
@@ -488,11 +631,12 @@ class TraceLayer():
             )]
         painter.end()
     
-    def _drawZtraceHighlights(self, trace_layer : QPixmap):
+    def _drawZtraceHighlights(self, trace_layer : QPixmap, exposed : list = None):
         """Draw highlighted points on the current trace layer.
         
             Params:
                 trace_layer (QPixmap): the pixmap to draw the points
+                exposed (list): only draw within these rectangles (x, y, w, h) if provided
         """
         points = []
         colors = []
@@ -511,6 +655,8 @@ class TraceLayer():
         
         # set up painter
         painter = QPainter(trace_layer)
+        if exposed is not None:
+            painter.setClipRegion(getRegion(exposed))
         painter.setOpacity(self.series.options["fill_opacity"])
 
         # draw points
@@ -519,7 +665,7 @@ class TraceLayer():
             painter.drawPoint(qpoint)
         painter.end()
    
-    def generateTraceLayer(self, pixmap_dim : tuple, window : list, show_all_traces=False, window_moved=True) -> QPixmap:
+    def generateTraceLayer(self, pixmap_dim : tuple, window : list, show_all_traces=False, window_moved=True, pan=False) -> QPixmap:
         """Generate the traces on a transparent background.
         
             Params:
@@ -527,50 +673,113 @@ class TraceLayer():
                 window (list): the view of the window (x, y, w, h)
                 show_all_traces (bool): True if all traces are displayed regardless of hidden status
                 window_moved (bool): True if the window has moved (upstream: same as generate_image)
+                pan (bool): True if the window was only panned and the traces are unchanged
             Returns:
                 (QPixmap): the pixmap with traces drawn in
         """
+        # check if the last trace layer can be shifted into the new window
+        shift = None
+        if pan and self.drawn_trace_layer is not None:
+            prev_layer, prev_dim, prev_window = self.drawn_trace_layer
+            if prev_dim == tuple(pixmap_dim):
+                shift = getPanShift(pixmap_dim, prev_window, window)
+
         self.window = window
         self.pixmap_dim = pixmap_dim
         pixmap_w, pixmap_h = tuple(pixmap_dim)
-        trace_layer = QPixmap(pixmap_w, pixmap_h)
-        trace_layer.fill(Qt.transparent)
 
-        if window_moved:
-            trace_list = self.section.tracesAsList()
+        # only the traces that may be in the view (allow a pixel for rounding)
+        window_x, window_y, window_w, window_h = tuple(window)
+        pad = 2 * window_w / pixmap_w
+        trace_list = self.section.getTracesInBounds((
+            window_x - pad,
+            window_y - pad,
+            window_x + window_w + pad,
+            window_y + window_h + pad
+        ))
+
+        # get what each trace looks like in this frame
+        view_tform = self.getViewTransform()
+        hidden = set(id(trace) for trace in self.section.temp_hide)
+        selected = set(id(trace) for trace in self.section.selected_traces)
+        drawn_traces = {}
+        for trace in trace_list:
+            if id(trace) in hidden or (trace.hidden and not show_all_traces):
+                continue
+            state = (
+                trace.getPointArray(),
+                trace.closed,
+                tuple(trace.color),
+                tuple(trace.fill_mode),
+                id(trace) in selected
+            )
+            drawn_traces[id(trace)] = (trace, state, self.getTraceBounds(trace, view_tform))
+        
+        # if only some traces changed, redraw the area around them on the last layer
+        frame = self.getFrameState(show_all_traces)
+        if (
+            not window_moved and
+            shift is None and
+            self.drawn_trace_layer is not None and
+            self.drawn_frame == frame
+        ):
+            trace_layer = self.drawn_trace_layer[0]
+            dirty = self.getDirtyRect(self.drawn_traces, drawn_traces)
+            self.drawn_traces = drawn_traces
+            if dirty is None:
+                return trace_layer
+            painter = QPainter(trace_layer)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.fillRect(*dirty, Qt.transparent)
+            painter.end()
+            exposed = [dirty]
         else:
-            trace_found = False
-            for trace in self.section.removed_traces:
-                for view_trace in self.traces_in_view:
-                    if trace.isSameTrace(view_trace):
-                        trace_found = True
-                        break
-                if trace_found:
-                    self.traces_in_view.remove(view_trace)
-            for trace in self.section.added_traces:
-                self.traces_in_view.append(trace)
-            trace_list = self.traces_in_view.copy()
+            trace_layer = QPixmap(pixmap_w, pixmap_h)
+            trace_layer.fill(Qt.transparent)
+            # only draw in the newly exposed areas
+            if shift is not None:
+                painter = QPainter(trace_layer)
+                painter.drawPixmap(*shift, prev_layer)
+                painter.end()
+                exposed = getExposedRects(pixmap_dim, shift)
+            else:
+                exposed = None
+        self.drawn_frame = frame
+        self.drawn_traces = drawn_traces
         
+        # draw the traces with the view transform on a single painter
+        painter = QPainter(trace_layer)
+        if exposed is not None:
+            painter.setClipRegion(getRegion(exposed))  # (in pixmap coordinates)
+        painter.setTransform(view_tform)
         self.traces_in_view = []
-        for trace in trace_list:
-            if (
-                trace not in self.section.temp_hide and
-                (show_all_traces or not trace.hidden)
-            ):
-                trace_in_view = self._drawTrace(
-                    trace_layer,
-                    trace
-                )
-                if trace_in_view:
-                    self.traces_in_view.append(trace)
+        for trace, state, bounds in drawn_traces.values():
+            trace_in_view = self._drawTrace(
+                painter,
+                trace,
+                state[-1],
+                exposed
+            )
+            if trace_in_view:
+                self.traces_in_view.append(trace)
+        painter.end()
+        
+        # only keep the paths for the traces that could be in the view
+        self.trace_paths = {
+            id(trace) : self.trace_paths[id(trace)]
+            for trace in trace_list
+            if id(trace) in self.trace_paths
+        }
         
         # draw ztraces
         self.zsegments_in_view = []
         if self.series.options["show_ztraces"]:
             for ztrace in self.series.ztraces.values():
                 if ztrace not in self.section.temp_hide:
-                    self._drawZtrace(trace_layer, ztrace)
-        self._drawZtraceHighlights(trace_layer)
+                    self._drawZtrace(trace_layer, ztrace, exposed)
+        self._drawZtraceHighlights(trace_layer, exposed)
+
+        self.drawn_trace_layer = (trace_layer, tuple(pixmap_dim), tuple(window))
                 
         return trace_layer
 
@@ -609,6 +818,41 @@ def boundsOverlap(b1 : tuple, b2 : tuple):
         b1[1] > b2[3]
     )
 
+def isSameState(state1 : tuple, state2 : tuple) -> bool:
+    """Check if a trace looks the same in two frames.
+    
+        Params:
+            state1 (tuple): points, closed, color, fill mode, selected
+            state2 (tuple): points, closed, color, fill mode, selected
+    """
+    return state1[0] is state2[0] and state1[1:] == state2[1:]
+
+def getCosmeticPen(color : QColor, width : int) -> QPen:
+    """Get a pen with a width in screen pixels (regardless of the painter transform).
+    
+        Params:
+            color (QColor): the pen color
+            width (int): the width in screen pixels
+        Returns:
+            (QPen): the pen
+    """
+    pen = QPen(color, width)
+    pen.setCosmetic(True)
+    return pen
+
+def getRegion(rects : list) -> QRegion:
+    """Get the region covered by a set of rectangles.
+    
+        Params:
+            rects (list): the x, y, w, h of each rectangle
+        Returns:
+            (QRegion): the combined region
+    """
+    region = QRegion()
+    for rect in rects:
+        region = region.united(QRegion(*rect))
+    return region
+
 def getTheta(line : QLine):
     """Get the angle a line makes with the x-axis.
     
@@ -44,14 +44,15 @@ class Surface(Object3D):
             self.traces[snum]["pos"] = []
             self.traces[snum]["neg"] = []
         
-        pts = []
-        for pt in trace.points:
-            if tform:
-                x, y = tform.map(*pt)
-            else:
-                x, y = pt
-            self.addToExtremes(x, y, snum)
-            pts.append((x, y))
+        if tform:
+            pts = tform.map(trace.points)
+        else:
+            pts = [tuple(pt) for pt in trace.points]
+        if pts:
+            xmin, ymin = np.min(pts, axis=0).tolist()
+            xmax, ymax = np.max(pts, axis=0).tolist()
+            self.addToExtremes(xmin, ymin, snum)
+            self.addToExtremes(xmax, ymax, snum)
         
         if trace.negative:
             self.traces[snum]["neg"].append(pts)
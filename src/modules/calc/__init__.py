@@ -1,6 +1,10 @@
 from .pfconversions import (
     pixmapPointToField,
-    fieldPointToPixmap
+    fieldPointToPixmap,
+    fieldPointsToPixmap,
+    getPanShift,
+    getExposedRects,
+    pixmapRectToField
 )
 from .quantification import (
     area,
@@ -1,3 +1,5 @@
+import numpy as np
+
 def pixmapPointToField(x : float, y : float, pixmap_dim : tuple, window : list, mag : float) -> tuple:
     """Convert main window pixmap coordinates to field window coordinates.
     
@@ -38,4 +40,102 @@ def fieldPointToPixmap(x : float, y : float, window : list, pixmap_dim : tuple,
     y = (y - window_y)/ mag * y_scaling
     y = pixmap_h - y
 
-    return round(x), round(y)
\ No newline at end of file
+    return round(x), round(y)
+
+def fieldPointsToPixmap(points : np.ndarray, window : list, pixmap_dim : tuple, mag : float) -> np.ndarray:
+    """Convert an array of field window coordinates to main window pixmap coordinates.
+    
+        Params:
+            points (np.ndarray): the N x 2 field points
+            window (list): the field viewing window
+            pixmap_dim (tuple): the w, h of pixmap
+            mag (float): the image magnification (microns/pixel)
+        Returns:
+            (np.ndarray) the N x 2 converted points in pixmap coordinates (integers)
+    """
+    pixmap_w, pixmap_h = tuple(pixmap_dim)
+    window_x, window_y, window_w, window_h = tuple(window)
+    x_scaling = pixmap_w / (window_w / mag) # screen pixel to actual image pixel ratio
+    y_scaling = pixmap_h / (window_h / mag) # should be the same number as previous
+    assert abs(x_scaling - y_scaling) < 1e-5
+    pix_points = np.empty(points.shape)
+    pix_points[:, 0] = (points[:, 0] - window_x) / mag * x_scaling
+    pix_points[:, 1] = pixmap_h - (points[:, 1] - window_y) / mag * y_scaling
+
+    return np.rint(pix_points).astype(int)
+
+def getPanShift(pixmap_dim : tuple, old_window : list, new_window : list, tol=1e-3) -> tuple:
+    """Get the whole pixel shift of the view between two windows of the same size.
+    
+        Params:
+            pixmap_dim (tuple): the w, h of pixmap
+            old_window (list): the previous field viewing window
+            new_window (list): the new field viewing window
+            tol (float): the max distance (in pixels) from a whole pixel shift
+        Returns:
+            (tuple) the x, y shift of the view contents in pixels (None if not a pure pan)
+    """
+    pixmap_w, pixmap_h = tuple(pixmap_dim)
+    old_x, old_y, old_w, old_h = tuple(old_window)
+    new_x, new_y, new_w, new_h = tuple(new_window)
+    # the window must not be resized
+    if abs(old_w - new_w) > old_w * 1e-9 or abs(old_h - new_h) > old_h * 1e-9:
+        return None
+    dx = (old_x - new_x) / new_w * pixmap_w
+    dy = (new_y - old_y) / new_h * pixmap_h
+    if abs(dx - round(dx)) > tol or abs(dy - round(dy)) > tol:
+        return None
+    dx, dy = round(dx), round(dy)
+    # nothing can be reused
+    if abs(dx) >= pixmap_w or abs(dy) >= pixmap_h:
+        return None
+    
+    return dx, dy
+
+def getExposedRects(pixmap_dim : tuple, shift : tuple) -> list:
+    """Get the areas of the pixmap that are not covered after shifting the view.
+    
+        Params:
+            pixmap_dim (tuple): the w, h of pixmap
+            shift (tuple): the x, y shift of the view contents in pixels
+        Returns:
+            (list) the x, y, w, h of each exposed rectangle
+    """
+    pixmap_w, pixmap_h = tuple(pixmap_dim)
+    dx, dy = tuple(shift)
+    rects = []
+    # full height strip on the left or right
+    if dx > 0:
+        rects.append((0, 0, dx, pixmap_h))
+    elif dx < 0:
+        rects.append((pixmap_w + dx, 0, -dx, pixmap_h))
+    # strip on the top or bottom (not overlapping the first)
+    x0 = max(dx, 0)
+    w = pixmap_w - abs(dx)
+    if dy > 0:
+        rects.append((x0, 0, w, dy))
+    elif dy < 0:
+        rects.append((x0, pixmap_h + dy, w, -dy))
+    
+    return rects
+
+def pixmapRectToField(rect : tuple, pixmap_dim : tuple, window : list) -> list:
+    """Get the field window shown by a rectangle of the pixmap.
+    
+        Params:
+            rect (tuple): the x, y, w, h of the pixmap rectangle
+            pixmap_dim (tuple): the w, h of pixmap
+            window (list): the field viewing window
+        Returns:
+            (list) the x, y, w, h of the field window for the rectangle
+    """
+    x, y, w, h = tuple(rect)
+    pixmap_w, pixmap_h = tuple(pixmap_dim)
+    window_x, window_y, window_w, window_h = tuple(window)
+
+    return [
+        window_x + x / pixmap_w * window_w,
+        window_y + (pixmap_h - y - h) / pixmap_h * window_h,
+        w / pixmap_w * window_w,
+        h / pixmap_h * window_h
+    ]
@@ -0,0 +1,175 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .section import Section
+from .transform import Transform
+from .object_table_item import ObjectTableItem
+
+# smaller edits are done in the main process (starting the workers takes a moment)
+min_parallel_sections = 16
+
+# the process pool shared by every series (created when first needed)
+pool = None
+
+def getWorkerCount() -> int:
+    """Get the number of worker processes for parallel edits."""
+    return max((os.cpu_count() or 1) - 1, 1)
+
+def getPool() -> ProcessPoolExecutor:
+    """Get the process pool for parallel edits."""
+    global pool
+    if pool is None:
+        # spawn (rather than fork) so that the workers do not inherit the GUI and its threads
+        pool = ProcessPoolExecutor(
+            max_workers=getWorkerCount(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return pool
+
+def editSectionFile(section_num : int, filepath : str, binary : bool, fn, args : tuple) -> tuple:
+    """Edit a section file (worker process).
+
+        Params:
+            section_num (int): the section number
+            filepath (str): the section file
+            binary (bool): True if the file should be written in the binary format
+            fn (function): the edit (see Series.editSections)
+            args (tuple): the arguments for the edit
+        Returns:
+            (int): the section number
+            (dict): the new metadata for the section (None if not modified)
+            the result of the edit
+    """
+    section = Section(section_num, None, filepath)
+    modified, result = fn(section, *args)
+    if not modified:
+        return section_num, None, result
+    section.writeFile(binary)
+    return section_num, section.getCurrentMetadata(), result
+
+# EDITS
+# Each edit modifies a section and returns (modified, result). The section
+# is not attached to a series when run in a worker process.
+
+def getObjectTableData(section : Section, obj_names : list, alignment : str) -> dict:
+    """Get the object table data for objects on a section.
+
+        Params:
+            section (Section): the section
+            obj_names (list): the object names
+            alignment (str): the alignment used for the measurements
+        Returns:
+            (dict): name : ObjectTableItem (only the section's data) for each object on the section
+    """
+    table_data = {}
+    for name in obj_names:
+        if name not in section.contours or section.contours[name].isEmpty():
+            continue
+        item = ObjectTableItem(name)
+        for trace in section.contours[name]:
+            item.addTrace(
+                trace,
+                section.tforms[alignment],
+                section.n,
+                section.thickness
+            )
+        table_data[name] = item
+    return table_data
+
+def getObjectTraces(section : Section, obj_names : list) -> list:
+    """Get the traces of a set of objects on a section."""
+    traces = []
+    for obj_name in obj_names:
+        if obj_name in section.contours:
+            traces += section.contours[obj_name].getTraces()
+    return traces
+
+def deleteObjectsOnSection(section : Section, obj_names : list):
+    """Delete objects from a section."""
+    modified = False
+    for obj_name in obj_names:
+        if obj_name in section.contours:
+            del(section.contours[obj_name])
+            modified = True
+    section.clearTraceIndex()
+    return modified, None
+
+def editObjectAttributesOnSection(section : Section, obj_names : list, name : str, color : tuple, tags : set, mode : tuple, alignment : str):
+    """Edit the attributes of objects on a section (returns the object table data if alignment is given)."""
+    traces = getObjectTraces(section, obj_names)
+    if not traces:
+        return False, None
+    section.editTraceAttributes(traces, name, color, tags, mode, add_tags=True)
+    if alignment is None:
+        return True, None
+    return True, getObjectTableData(section, set(obj_names) | ({name} if name else set()), alignment)
+
+def editObjectRadiusOnSection(section : Section, obj_names : list, new_rad : float, alignment : str):
+    """Change the radius of the traces of objects on a section (returns the object table data if alignment is given)."""
+    traces = getObjectTraces(section, obj_names)
+    if not traces:
+        return False, None
+    section.editTraceRadius(traces, new_rad)
+    if alignment is None:
+        return True, None
+    return True, getObjectTableData(section, obj_names, alignment)
+
+def removeTraceTagsOnSection(section : Section, obj_names : list):
+    """Remove the tags from the traces of objects on a section."""
+    traces = getObjectTraces(section, obj_names)
+    if not traces:
+        return False, None
+    section.editTraceAttributes(
+        traces,
+        name=None,
+        color=None,
+        tags=set(),
+        mode=None,
+    )
+    return True, None
+
+def hideObjectsOnSection(section : Section, obj_names : list, hide : bool):
+    """Hide or unhide the traces of objects on a section."""
+    traces = getObjectTraces(section, obj_names)
+    for trace in traces:
+        trace.setHidden(hide)
+    return bool(traces), None
+
+def getObjectPointsOnSection(section : Section, obj_name : str, cross_sectioned : bool):
+    """Get the points for a ztrace from an object on a section (does not modify the section).
+
+        Returns:
+            (bool): False
+            (list): (creation datetime, midpoint, color) for each trace (or one for the contour if cross_sectioned)
+    """
+    if obj_name not in section.contours or section.contours[obj_name].isEmpty():
+        return False, []
+    contour = section.contours[obj_name]
+    if cross_sectioned:
+        return False, [(None, contour.getMidpoint(), contour[0].color)]
+    points = []
+    for trace in contour:
+        points.append((trace.history[0].dt, trace.getMidpoint(), trace.color))
+    return False, points
+
+def setMagOnSection(section : Section, new_mag : float):
+    """Set the magnification for a section."""
+    section.setMag(new_mag)
+    return True, None
+
+def setTformOnSection(section : Section, alignment : str, tform : list, pixel_units : bool):
+    """Set the transform for an alignment on a section.
+
+        Params:
+            alignment (str): the alignment
+            tform (list): the six transform numbers
+            pixel_units (bool): True if the translation is in image pixels
+    """
+    tform = tform.copy()
+    if pixel_units:
+        # multiply pixel translations by magnification of section
+        tform[2] *= section.mag
+        tform[5] *= section.mag
+    section.tforms[alignment] = Transform(tform)
+    return True, None
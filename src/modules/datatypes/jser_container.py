@@ -0,0 +1,266 @@
+import os
+import re
+import json
+import struct
+import zipfile
+
+try:
+    from numcodecs import Zstd
+    zstd_imported = True
+except ImportError:
+    zstd_imported = False
+
+from .section_binary import isBinarySection, loadSectionData
+
+# series.{save number}.json holds the series data and the manifest
+manifest_re = re.compile(r"series\.(\d+)\.json(\.zst)?$")
+
+# members ending in .zst are compressed with zstd (and stored in the zip as is)
+zstd_ext = ".zst"
+zstd_level = 3
+
+# the end of a container that is being appended to is kept here until the save is finished
+journal_ext = ".journal"
+
+def writeJournal(fp : str):
+    """Save the part of a container that appending overwrites.
+
+    Appending writes the new members over the central directory at the end of
+    the zip and writes a new one when finished. Everything before the central
+    directory is left as is, so the previous container can be restored from
+    the old central directory and file size.
+
+        Params:
+            fp (str): the filepath of the jser
+    """
+    with zipfile.ZipFile(fp, "r") as z:
+        offset = z.start_dir
+    size = os.path.getsize(fp)
+    with open(fp, "rb") as f:
+        f.seek(offset)
+        tail = f.read()
+    journal_fp = fp + journal_ext
+    with open(journal_fp + ".tmp", "wb") as f:
+        f.write(struct.pack("<QQ", offset, size))
+        f.write(tail)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(journal_fp + ".tmp", journal_fp)
+
+def recoverJser(fp : str) -> bool:
+    """Restore a container if a save that appended to it did not finish.
+
+        Params:
+            fp (str): the filepath of the jser
+        Returns:
+            (bool): True if the container was restored
+    """
+    journal_fp = fp + journal_ext
+    if not os.path.isfile(journal_fp) or not os.path.isfile(fp):
+        return False
+    with open(journal_fp, "rb") as f:
+        offset, size = struct.unpack("<QQ", f.read(16))
+        tail = f.read()
+    with open(fp, "r+b") as f:
+        f.seek(offset)
+        f.write(tail)
+        f.truncate(size)
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(journal_fp)
+    return True
+
+class JserContainer():
+
+    def __init__(self, fp : str):
+        """Open a jser container for reading.
+
+        The container is a zip file. Every save adds a member for each modified
+        section and a new manifest containing the series data and, for each
+        section, the name of its latest member and its metadata. The manifest
+        with the highest save number is the current one; members that it does
+        not reference are left over from previous saves.
+
+            Params:
+                fp (str): the filepath of the jser
+        """
+        self.fp = fp
+        recoverJser(fp)
+        self.zip = zipfile.ZipFile(fp, "r")
+
+        # find the latest manifest
+        self.save_num = -1
+        for name in self.zip.namelist():
+            m = manifest_re.match(name)
+            if m and int(m.group(1)) > self.save_num:
+                self.save_num = int(m.group(1))
+                self.manifest_name = name
+        if self.save_num < 0:
+            raise ValueError(f"No series data found in {fp}")
+        manifest = json.loads(self.readMember(self.manifest_name))
+
+        self.series_data = manifest["series"]
+        self.sections = {}
+        for snum, section_index in manifest["sections"].items():
+            self.sections[int(snum)] = section_index
+
+    # STATIC METHOD
+    def isContainer(fp : str) -> bool:
+        """Return True if the file is a jser container (rather than a JSON jser).
+
+        A container left by an unfinished save is restored first.
+
+            Params:
+                fp (str): the filepath of the jser
+        """
+        recoverJser(fp)
+        return os.path.isfile(fp) and zipfile.is_zipfile(fp)
+
+    def readMember(self, name : str) -> bytes:
+        """Read (and decompress) a member of the container.
+
+            Params:
+                name (str): the name of the member
+            Returns:
+                (bytes): the contents of the member
+        """
+        data = self.zip.read(name)
+        if name.endswith(zstd_ext):
+            if not zstd_imported:
+                raise ImportError("numcodecs is required to read this series")
+            data = bytes(Zstd().decode(data))
+        return data
+
+    def readSection(self, section_num : int) -> dict:
+        """Read the JSON data for a section.
+
+            Params:
+                section_num (int): the section number
+            Returns:
+                (dict): the section data
+        """
+        return loadSectionData(self.readMember(self.sections[section_num]["member"]))
+
+    def getGarbageSize(self) -> int:
+        """Get the number of bytes taken up by members that are no longer used."""
+        used = {s["member"] for s in self.sections.values()}
+        used.add(self.manifest_name)
+        return sum(
+            info.compress_size for info in self.zip.infolist()
+            if info.filename not in used
+        )
+
+    def needsCompaction(self) -> bool:
+        """Return True if most of the container is left over from previous saves."""
+        return self.getGarbageSize() > os.path.getsize(self.fp) // 2
+
+    def close(self):
+        """Close the container."""
+        self.zip.close()
+
+class JserContainerWriter():
+
+    def __init__(self, fp : str, save_num : int = 0, append=False, compression="zstd"):
+        """Write a jser container.
+
+        A new container is written to a temporary file that replaces fp when
+        the writer is closed, so the previous file is intact until then.
+        Appending writes the new members to the end of the existing container;
+        the central directory they overwrite is saved to a journal first, so
+        that the previous container can be restored if the save does not finish.
+        Each member is compressed separately so that it can be read on its own.
+
+            Params:
+                fp (str): the filepath of the jser
+                save_num (int): the save number for the new members
+                append (bool): True if adding to an existing container
+                compression (str): "zstd", "deflate", or "none"
+        """
+        self.fp = fp
+        self.save_num = save_num
+        self.append = append
+        # zip deflate can be used if zstd is not available
+        if compression == "zstd" and not zstd_imported:
+            compression = "deflate"
+        self.compression = compression
+        if append:
+            self.write_fp = fp
+            recoverJser(fp)
+            writeJournal(fp)
+            self.zip = zipfile.ZipFile(fp, "a")
+        else:
+            self.write_fp = fp + ".tmp"
+            self.zip = zipfile.ZipFile(self.write_fp, "w")
+        self.sections = {}
+
+    def writeSection(self, section_num : int, data : bytes, section_index : dict):
+        """Add a section to the container.
+
+            Params:
+                section_num (int): the section number
+                data (bytes): the contents of the section file (JSON or binary)
+                section_index (dict): the metadata for the section
+        """
+        ext = "bin" if isBinarySection(data) else "json"
+        member = self.writeMember(f"sections/{section_num}.{self.save_num}.{ext}", data)
+        self.keepSection(section_num, dict(section_index, member=member))
+    
+    def writeMember(self, name : str, data : bytes) -> str:
+        """Compress and add a member to the container.
+
+            Params:
+                name (str): the name of the member
+                data (bytes): the contents of the member
+            Returns:
+                (str): the name of the member in the container
+        """
+        if self.compression == "zstd":
+            name += zstd_ext
+            self.zip.writestr(name, bytes(Zstd(level=zstd_level).encode(data)))
+        elif self.compression == "deflate":
+            self.zip.writestr(
+                name,
+                data,
+                compress_type=zipfile.ZIP_DEFLATED,
+                compresslevel=1
+            )
+        else:
+            self.zip.writestr(name, data)
+        return name
+
+    def keepSection(self, section_num : int, section_index : dict):
+        """Reference a section that is already in the container.
+
+            Params:
+                section_num (int): the section number
+                section_index (dict): the member name and metadata for the section
+        """
+        self.sections[section_num] = section_index
+
+    def close(self, series_data : dict):
+        """Write the manifest and finish the container.
+
+            Params:
+                series_data (dict): the series data
+        """
+        manifest = {"series": series_data, "sections": self.sections}
+        self.writeMember(
+            f"series.{self.save_num}.json",
+            json.dumps(manifest).encode()
+        )
+        self.zip.close()
+        if self.append:
+            # the new central directory must be on disk before the journal is removed
+            with open(self.fp, "r+b") as f:
+                os.fsync(f.fileno())
+            os.remove(self.fp + journal_ext)
+        else:
+            os.replace(self.write_fp, self.fp)
+
+    def abort(self):
+        """Stop writing a new container (the previous file is kept)."""
+        self.zip.close()
+        if self.append:
+            recoverJser(self.fp)
+        elif os.path.isfile(self.write_fp):
+            os.remove(self.write_fp)
@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import codecs
+
+# the next string (complete or cut off by the end of the buffer) or bracket
+token_re = re.compile(r'[^"\[\]{}]*("[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}"])')
+
+class JserReader():
+
+    def __init__(self, fp : str, chunk_size : int = 2**20, skip_keys : set = None):
+        """Read a jser file one value at a time instead of loading the whole file.
+
+        Iterating yields (key, data, start, end) for the series and for each
+        section, where key is "series" or the section number, and start and end
+        are the byte offsets of the value in the file. Empty sections are not
+        yielded. Only one value is held in memory at a time.
+
+            Params:
+                fp (str): the filepath of the jser
+                chunk_size (int): the number of bytes to read at a time
+                skip_keys (set): section keys to skip without decoding (left out of the section data)
+        """
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.skip_keys = skip_keys
+        self.file_size = os.path.getsize(fp)
+
+        self.file = None
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.buffer_offset = 0  # byte offset of the start of the buffer
+        self.eof = False
+
+    def getProgress(self) -> float:
+        """Get the fraction of the file that has been read."""
+        if not self.file_size:
+            return 1
+        return min(self.buffer_offset / self.file_size, 1)
+
+    def _read(self, n : int = None) -> bool:
+        """Add more of the file to the buffer.
+
+            Params:
+                n (int): the min number of bytes to read
+            Returns:
+                (bool): False if the end of the file was already reached
+        """
+        if self.eof:
+            return False
+        data = self.file.read(max(n or 0, self.chunk_size))
+        if not data:
+            self.eof = True
+            self.buffer += self.utf8.decode(b"", final=True)
+            return False
+        self.buffer += self.utf8.decode(data)
+        return True
+
+    def _discard(self):
+        """Remove the part of the buffer that has already been read."""
+        if self.pos:
+            consumed = self.buffer[:self.pos]
+            self.buffer_offset += len(consumed.encode("utf-8"))
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+    def _getByteOffset(self) -> int:
+        """Get the byte offset of the current position in the file."""
+        return self.buffer_offset + len(self.buffer[:self.pos].encode("utf-8"))
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character (empty string if end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self._discard()
+            if not self._read():
+                return ""
+
+    def _expect(self, chars : str) -> str:
+        """Consume the next character, which must be one of chars.
+
+            Params:
+                chars (str): the allowed characters
+            Returns:
+                (str): the character
+        """
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(f"Invalid jser file: expected '{chars}' at byte {self._getByteOffset()}")
+        self.pos += 1
+        return c
+
+    def _decodeValue(self):
+        """Decode the next JSON value, reading more of the file as needed.
+
+            Returns:
+                (tuple): the value, start byte offset, and end byte offset
+        """
+        self._peek()
+        self._discard()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number at the end of the buffer could continue in the file
+                if end < len(self.buffer) or self.eof or isinstance(value, (dict, list, str)):
+                    break
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # read at least as much as is buffered to avoid decoding too often
+            self._read(len(self.buffer))
+        start = self.buffer_offset
+        self.pos = end
+        return value, start, self._getByteOffset()
+    
+    def _skipValue(self):
+        """Move past the next JSON value without decoding it."""
+        if self._peek() not in "[{":
+            self._decodeValue()
+            return
+        depth = 0
+        pos = self.pos
+        while True:
+            m = token_re.match(self.buffer, pos)
+            if m is None or m.group(1) == '"':
+                # the rest of the value (or the string) is not in the buffer yet
+                self.pos = len(self.buffer) if m is None else m.start(1)
+                self._discard()
+                pos = self.pos
+                if not self._read():
+                    raise ValueError(f"Invalid jser file: unexpected end of file")
+                continue
+            c = m.group(1)
+            if c in "[{":
+                depth += 1
+            elif c in "]}":
+                depth -= 1
+                if depth == 0:
+                    self.pos = m.end()
+                    return
+            pos = m.end()
+    
+    def _decodeSection(self):
+        """Decode the next section, skipping the values of self.skip_keys.
+
+            Returns:
+                (tuple): the section data, start byte offset, and end byte offset
+        """
+        if not self.skip_keys or self._peek() != "{":
+            return self._decodeValue()
+        start = self._getByteOffset()
+        self._expect("{")
+        section_data = {}
+        if self._peek() == "}":
+            self.pos += 1
+        else:
+            while True:
+                key, _, _ = self._decodeValue()
+                self._expect(":")
+                if key in self.skip_keys:
+                    self._skipValue()
+                else:
+                    section_data[key] = self._decodeValue()[0]
+                if self._expect(",}") == "}":
+                    break
+        return section_data, start, self._getByteOffset()
+    
+    # STATIC METHOD
+    def getKey(key : str):
+        """Get the section number or "series" for a top-level key of an old jser.
+
+        Keys are the extension OR the name + extension of the original files.
+
+            Params:
+                key (str): the key in the jser
+            Returns:
+                (int or str): the section number or "series"
+        """
+        ext = key[key.rfind(".")+1:] if "." in key else key
+        return int(ext) if ext.isnumeric() else "series"
+
+    def __iter__(self):
+        """Iterate through the values in the jser."""
+        with open(self.fp, "rb") as self.file:
+            self._expect("{")
+            if self._peek() == "}":
+                return
+            while True:
+                key, _, _ = self._decodeValue()
+                self._expect(":")
+                if key == "sections" and self._peek() == "[":
+                    # yield each section separately
+                    self._expect("[")
+                    if self._peek() == "]":
+                        self.pos += 1
+                    else:
+                        snum = 0
+                        while True:
+                            section_data, start, end = self._decodeSection()
+                            if section_data is not None:
+                                yield snum, section_data, start, end
+                            snum += 1
+                            if self._expect(",]") == "]":
+                                break
+                elif key == "series":
+                    yield (key, *self._decodeValue())
+                else:
+                    # UPDATE FROM OLD JSER FORMATS
+                    key = JserReader.getKey(key)
+                    if key == "series":
+                        yield (key, *self._decodeValue())
+                    else:
+                        section_data, start, end = self._decodeSection()
+                        if section_data is not None:
+                            yield key, section_data, start, end
+                if self._expect(",}") == "}":
+                    break
+            self._discard()
@@ -4,6 +4,8 @@ import json
 from .contour import Contour
 from .trace import Trace
 from .transform import Transform
+from .trace_index import TraceIndex
+from .section_binary import isBinarySection, binaryToTraces, dumpSectionData
 
 from modules.calc import (
     getDistanceFromTrace,
@@ -14,19 +16,23 @@ from modules.constants import assets_dir
 
 class Section():
 
-    def __init__(self, n : int, series):
+    def __init__(self, n : int, series, filepath : str = None):
         """Load the section file.
         
             Params:
                 n (int): the section number
-                series (Series): the series that contains the section
+                series (Series): the series that contains the section (None if editing the file in another process)
+                filepath (str): the section file (if not given, the file is found through the series)
         """
         self.n = n
         self.series = series
-        self.filepath = os.path.join(
-            self.series.getwdir(),
-            self.series.sections[n]
-        )
+        if filepath:
+            self.filepath = filepath
+        else:
+            self.filepath = os.path.join(
+                self.series.getwdir(),
+                self.series.sections[n]
+            )
 
         self.selected_traces = []
         self.selected_ztraces = []
@@ -37,10 +43,25 @@ class Section():
         self.removed_traces = []
         self.modified_traces = []
 
-        with open(self.filepath, "r") as f:
-            section_data = json.load(f)
+        # spatial index of the traces (created when first needed)
+        self.trace_index = None
+
+        with open(self.filepath, "rb") as f:
+            data = f.read()
+        if isBinarySection(data):
+            # the traces are created directly from the point arrays
+            section_data, contours = binaryToTraces(data)
+            section_data["contours"] = {}
+        else:
+            section_data = json.loads(data)
+            contours = None
         
         Section.updateJSON(section_data)  # update any missing attributes
+        if contours is None:
+            contours = {
+                name : [Trace.fromList(trace_data, name) for trace_data in trace_list]
+                for name, trace_list in section_data["contours"].items()
+            }
         
         self.src = section_data["src"]
         self.brightness = section_data["brightness"]
@@ -53,18 +74,15 @@ class Section():
             self.tforms[a] = Transform(section_data["tforms"][a])
         
         self.thickness = section_data["thickness"]
-        self.contours = section_data["contours"]
-        for name in self.contours:
-            trace_list = []
-            for trace_data in self.contours[name]:
-                trace = Trace.fromList(trace_data, name)
-                # screen for defective traces
-                if len(trace.points) > 1:
-                    trace_list.append(trace)
-            self.contours[name] = Contour(
-                name,
-                trace_list
-            )
+        self.contours = {}
+        for name in contours:
+            # screen for defective traces
+            trace_list = [trace for trace in contours[name] if trace.getPointCount() > 1]
+            if trace_list:
+                self.contours[name] = Contour(
+                    name,
+                    trace_list
+                )
         
         # ADDED SINCE JAN 25TH
 
@@ -115,9 +133,32 @@ class Section():
         for cname in flagged_contours:
             del(section_data["contours"][cname])
 
-    def getDict(self) -> dict:
+    # STATIC METHOD
+    def getMetadata(section_data : dict) -> dict:
+        """Get the section attributes used by the series and the section table (the traces are reduced to the object names).
+        
+            Params:
+                section_data (dict): the section JSON
+            Returns:
+                (dict): the section attributes
+        """
+        return {
+            "src": section_data["src"],
+            "brightness": section_data["brightness"],
+            "contrast": section_data["contrast"],
+            "mag": section_data["mag"],
+            "align_locked": section_data["align_locked"],
+            "tforms": section_data["tforms"],
+            "thickness": section_data["thickness"],
+            "calgrid": section_data["calgrid"],
+            "contours": list(section_data["contours"].keys())
+        }
+
+    def getDict(self, include_contours=True) -> dict:
         """Convert section object into a dictionary.
         
+            Params:
+                include_contours (bool): False if only the section attributes are needed
             Returns:
                 (dict) all of the compiled section data
         """
@@ -137,11 +178,12 @@ class Section():
 
         # save contours
         d["contours"] = {}
-        for contour_name in self.contours:
-            if not self.contours[contour_name].isEmpty():
-                d["contours"][contour_name] = [
-                    trace.getList(include_name=False) for trace in self.contours[contour_name]
-                ]
+        if include_contours:
+            for contour_name in self.contours:
+                if not self.contours[contour_name].isEmpty():
+                    d["contours"][contour_name] = [
+                        trace.getList(include_name=False) for trace in self.contours[contour_name]
+                    ]
         
         # ADDED SINCE JAN 25TH
 
@@ -192,16 +234,94 @@ class Section():
             section_file.write(json.dumps(section_data, indent=2))
    
     def save(self):
-        """Save file into json."""
+        """Save file into json (the file is written in the background)."""
         try:
             if os.path.samefile(self.filepath, os.path.join(assets_dir, "welcome_series", "welcome.0")):
                 return  # ignore welcome series
         except FileNotFoundError:
             pass
     
-        d = self.getDict()
-        with open(self.filepath, "w") as f:
-            f.write(json.dumps(d, indent=1))
+        metadata = self.getCurrentMetadata()
+        self.series.saveSection(self)
+        self.series.modified_sections.add(self.n)
+        # the index file is written when the sections are flushed
+        self.series.setSectionMetadata(self.n, metadata, save_index=False)
+    
+    def writeFile(self, binary=False):
+        """Write the section file (replaces the file once it is fully written).
+        
+            Params:
+                binary (bool): True if the binary format should be used
+        """
+        data = dumpSectionData(self.getDict(), binary=binary, indent=1)
+        tmp_fp = self.filepath + ".tmp"
+        with open(tmp_fp, "wb") as f:
+            f.write(data)
+        os.replace(tmp_fp, self.filepath)
+    
+    def copy(self):
+        """Create a copy of the section object (selected traces and tracking are not copied).
+        
+            Returns:
+                (Section): a copy of the object
+        """
+        copy_section = Section.__new__(Section)
+        copy_section.__dict__ = self.__dict__.copy()
+        copy_section.filepath = os.path.join(
+            self.series.getwdir(),
+            self.series.sections[self.n]
+        )
+        copy_section.selected_traces = []
+        copy_section.selected_ztraces = []
+        copy_section.temp_hide = []
+        copy_section.clearTracking()
+        copy_section.trace_index = None
+        copy_section.tforms = {}
+        for a in self.tforms:
+            copy_section.tforms[a] = self.tforms[a].copy()
+        copy_section.contours = {}
+        for name in self.contours:
+            copy_section.contours[name] = self.contours[name].copy()
+        return copy_section
+    
+    def getTraceIndex(self) -> TraceIndex:
+        """Get the spatial index of the traces (created if missing or if the alignment has changed).
+        
+            Returns:
+                (TraceIndex): the index of the transformed trace bounds
+        """
+        tform = self.tforms[self.series.alignment]
+        if self.trace_index is None or not self.trace_index.isValid(tform):
+            self.trace_index = TraceIndex(self.tracesAsList(), tform, self.trace_index)
+        return self.trace_index
+    
+    def clearTraceIndex(self):
+        """Remove the spatial index of the traces (needed if traces are modified without removing and adding them)."""
+        self.trace_index = None
+    
+    def getTracesInBounds(self, bounds : tuple) -> list[Trace]:
+        """Get the traces whose transformed bounds overlap a rectangle.
+        
+            Params:
+                bounds (tuple): xmin, ymin, xmax, ymax in field coordinates
+            Returns:
+                (list): the traces
+        """
+        return self.getTraceIndex().query(bounds)
+    
+    def getCurrentMetadata(self) -> dict:
+        """Get the metadata for the current state of the section (see Section.getMetadata)."""
+        metadata = Section.getMetadata(self.getDict(include_contours=False))
+        metadata["contours"] = self.getObjectNames()
+        return metadata
+    
+    def getObjectNames(self) -> list:
+        """Get the names of the objects that have traces on the section.
+        
+            Returns:
+                (list): the object names
+        """
+        return [name for name in self.contours if not self.contours[name].isEmpty()]
     
     def tracesAsList(self) -> list[Trace]:
         """Return the trace dictionary as a list. Does NOT copy traces.
@@ -242,6 +362,7 @@ class Section():
         # modify the traces
         for trace in self.tracesAsList():
             trace.magScale(self.mag, new_mag)
+        self.clearTraceIndex()
         
         self.mag = new_mag
     
@@ -265,6 +386,8 @@ class Section():
             self.contours[trace.name].append(trace)
         else:
             self.contours[trace.name] = Contour(trace.name, [trace])
+        if self.trace_index is not None:
+            self.trace_index.add(trace)
         
         self.added_traces.append(trace)
     
@@ -276,6 +399,8 @@ class Section():
         """
         if trace.name in self.contours:
             self.contours[trace.name].remove(trace)
+            if self.trace_index is not None:
+                self.trace_index.remove(trace)
             self.removed_traces.append(trace.copy())
 
     def editTraceAttributes(self, traces : list[Trace], name : str, color : tuple, tags : set, mode : tuple, add_tags=False):
@@ -353,21 +478,25 @@ class Section():
         closest_trace_interior = None
         tform = self.tforms[self.series.alignment]
 
+        # only check the traces near the point (the distance is approximate at the scale of the image pixels)
+        pad = radius + 2 * self.mag
+        traces = self.getTracesInBounds((
+            field_x - pad,
+            field_y - pad,
+            field_x + pad,
+            field_y + pad
+        ))
         # only check the traces within the view if provided
         if traces_in_view:
-            traces = traces_in_view
-        else:
-            traces = self.tracesAsList()
+            in_view = set(id(trace) for trace in traces_in_view)
+            traces = [trace for trace in traces if id(trace) in in_view]
         
         # iterate through all traces to get closest
         for trace in traces:
             # skip hidden traces
             if trace.hidden:
                 continue
-            points = []
-            for point in trace.points:
-                x, y = tform.map(*point)
-                points.append((x,y))
+            points = tform.map(trace.points)
             
             # find the distance of the point from each trace
             dist = getDistanceFromTrace(
@@ -489,16 +618,10 @@ class Section():
         tform = self.tforms[self.series.alignment]
         for trace in self.selected_traces:
             self.removeTrace(trace)
-            for i, p in enumerate(trace.points):
-                # apply forward transform
-                x, y = tform.map(*p)
-                # apply translate
-                x += dx
-                y += dy
-                # apply reverse transform
-                x, y = tform.map(x, y, inverted=True)
-                # replace point
-                trace.points[i] = (x, y)
+            # apply forward transform, translate, and apply reverse transform
+            points = tform.mapArray(trace.getPointArray())
+            points += (dx, dy)
+            trace.points = tform.mapArray(points, inverted=True)
             self.addTrace(trace, log_message="translated")
         for ztrace, i in self.selected_ztraces:
             x, y, snum = ztrace.points[i]
@@ -525,5 +648,6 @@ class Section():
                 self.contours[cname].importTraces(contour)
             else:
                 self.contours[cname] = contour.copy()
+        self.clearTraceIndex()
         
         self.save()
\ No newline at end of file
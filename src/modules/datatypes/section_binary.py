@@ -0,0 +1,202 @@
+import json
+import struct
+import numpy as np
+
+from .trace import Trace
+from .trace_log import TraceLog
+
+# identifies a binary section file
+binary_magic = b"PYRSEC\x00\x01"
+
+# bits in the flag column
+CLOSED = 1
+NEGATIVE = 2
+HIDDEN = 4
+
+def isBinarySection(data : bytes) -> bool:
+    """Return True if the section file contents are in the binary format.
+
+        Params:
+            data (bytes): the contents of the section file
+    """
+    return data[:len(binary_magic)] == binary_magic
+
+def sectionToBinary(section_data : dict) -> bytes:
+    """Encode section JSON in the binary format.
+
+    The points of every trace are stored as two contiguous float64 arrays (x
+    and y) with an int64 array of trace offsets and a uint8 array of trace
+    flags. The remaining trace attributes are stored as columns in a JSON
+    header with the rest of the section data.
+
+        Params:
+            section_data (dict): the section JSON (traces in list format)
+        Returns:
+            (bytes): the encoded section
+    """
+    header = {"section": {}, "contours": []}
+    for key, value in section_data.items():
+        if key != "contours":
+            header["section"][key] = value
+    color, fill_mode, tags, history = [], [], [], []
+    x, y, offsets, flags = [], [], [0], []
+    for name, trace_list in section_data["contours"].items():
+        header["contours"].append([name, len(trace_list)])
+        for tx, ty, tcolor, closed, negative, hidden, tfill_mode, ttags, thistory in trace_list:
+            x += tx
+            y += ty
+            offsets.append(len(x))
+            flags.append(
+                (CLOSED if closed else 0) |
+                (NEGATIVE if negative else 0) |
+                (HIDDEN if hidden else 0)
+            )
+            color.append(tcolor)
+            fill_mode.append(tfill_mode)
+            tags.append(ttags)
+            history.append(thistory)
+    header["color"] = color
+    header["fill_mode"] = fill_mode
+    header["tags"] = tags
+    header["history"] = history
+
+    header_bytes = json.dumps(header).encode()
+    # pad the header so that the arrays are aligned
+    header_bytes += b" " * (-len(header_bytes) % 8)
+
+    return b"".join((
+        binary_magic,
+        struct.pack("<QQQ", len(header_bytes), len(x), len(flags)),
+        header_bytes,
+        np.array(x, dtype="<f8").tobytes(),
+        np.array(y, dtype="<f8").tobytes(),
+        np.array(offsets, dtype="<i8").tobytes(),
+        np.array(flags, dtype="u1").tobytes()
+    ))
+
+def binaryToArrays(data : bytes) -> tuple:
+    """Read the header and the arrays of a binary section without copying the arrays.
+
+        Params:
+            data (bytes): the encoded section
+        Returns:
+            (dict): the JSON header
+            (np.ndarray): the x values of all points
+            (np.ndarray): the y values of all points
+            (np.ndarray): the start of each trace (and the end of the last)
+            (np.ndarray): the flags for each trace
+    """
+    pos = len(binary_magic)
+    header_len, npoints, ntraces = struct.unpack_from("<QQQ", data, pos)
+    pos += 24
+    header = json.loads(data[pos:pos + header_len])
+    pos += header_len
+    x = np.frombuffer(data, dtype="<f8", count=npoints, offset=pos)
+    pos += 8 * npoints
+    y = np.frombuffer(data, dtype="<f8", count=npoints, offset=pos)
+    pos += 8 * npoints
+    offsets = np.frombuffer(data, dtype="<i8", count=ntraces + 1, offset=pos)
+    pos += 8 * (ntraces + 1)
+    flags = np.frombuffer(data, dtype="u1", count=ntraces, offset=pos)
+    return header, x, y, offsets, flags
+
+def binaryToTraces(data : bytes) -> tuple:
+    """Decode a binary section with the traces created directly from the point arrays.
+
+    The x and y arrays are stacked once into a read-only array, and each trace
+    gets its slice of it (the points are not converted to lists).
+
+        Params:
+            data (bytes): the encoded section
+        Returns:
+            (dict): the section JSON without the contours
+            (dict): name : list of Trace for each contour
+    """
+    header, x, y, offsets, flags = binaryToArrays(data)
+    points = np.column_stack((x, y))
+    points.setflags(write=False)
+    offsets = offsets.tolist()
+    flags = flags.tolist()
+
+    contours = {}
+    i = 0
+    for name, count in header["contours"]:
+        trace_list = []
+        for _ in range(count):
+            trace = Trace(name, header["color"][i], bool(flags[i] & CLOSED))
+            trace.negative = bool(flags[i] & NEGATIVE)
+            trace.points = points[offsets[i]:offsets[i+1]]
+            trace.hidden = bool(flags[i] & HIDDEN)
+            trace.fill_mode = header["fill_mode"][i]
+            trace.tags = set(header["tags"][i])
+            trace.history = [TraceLog(l) for l in header["history"][i]]
+            trace_list.append(trace)
+            i += 1
+        contours[name] = trace_list
+
+    return header["section"], contours
+
+def binaryToSection(data : bytes) -> dict:
+    """Decode a binary section to section JSON (used to convert to the JSON format).
+
+        Params:
+            data (bytes): the encoded section
+        Returns:
+            (dict): the section JSON (traces in list format)
+    """
+    header, x, y, offsets, flags = binaryToArrays(data)
+    x = x.tolist()
+    y = y.tolist()
+    offsets = offsets.tolist()
+    flags = flags.tolist()
+
+    section_data = header["section"]
+    section_data["contours"] = {}
+    i = 0
+    for name, count in header["contours"]:
+        trace_list = []
+        for _ in range(count):
+            start, end = offsets[i], offsets[i+1]
+            trace_list.append([
+                x[start:end],
+                y[start:end],
+                header["color"][i],
+                bool(flags[i] & CLOSED),
+                bool(flags[i] & NEGATIVE),
+                bool(flags[i] & HIDDEN),
+                header["fill_mode"][i],
+                header["tags"][i],
+                header["history"][i]
+            ])
+            i += 1
+        section_data["contours"][name] = trace_list
+
+    return section_data
+
+def loadSectionData(data : bytes) -> dict:
+    """Decode the contents of a section file in either format.
+
+        Params:
+            data (bytes): the contents of the section file
+        Returns:
+            (dict): the section JSON
+    """
+    if isBinarySection(data):
+        return binaryToSection(data)
+    else:
+        return json.loads(data)
+
+def dumpSectionData(section_data : dict, binary=False, indent=None) -> bytes:
+    """Encode section JSON for a section file.
+
+        Params:
+            section_data (dict): the section JSON
+            binary (bool): True if the binary format should be used
+            indent (int): the indent for the JSON format
+        Returns:
+            (bytes): the contents of the section file
+    """
+    if binary:
+        return sectionToBinary(section_data)
+    else:
+        return json.dumps(section_data, indent=indent).encode()
@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+# estimated memory used by the section data
+point_bytes = 16  # two floats in the trace's point array
+trace_bytes = 768  # the trace object, its attributes, and its history
+section_bytes = 4096  # everything other than the traces
+
+class SectionCache():
+
+    def __init__(self, max_bytes : int):
+        """Create a least-recently-used cache for loaded sections.
+
+        Sections are keyed by section number. The cached sections are never
+        handed out to be edited: Series.loadSection returns a copy, and
+        Section.save replaces the cached section with a copy of the saved one.
+
+            Params:
+                max_bytes (int): the memory budget for the cache
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.sections = OrderedDict()  # snum : (section, size)
+        self.versions = {}  # snum : number of times the section has been saved
+        self.lock = threading.Lock()
+
+    def get(self, section_num : int):
+        """Get a section from the cache.
+
+            Params:
+                section_num (int): the section number
+            Returns:
+                (Section): the cached section (None if not cached)
+        """
+        with self.lock:
+            item = self.sections.get(section_num)
+            if item is None:
+                return None
+            self.sections.move_to_end(section_num)
+            return item[0]
+
+    def getVersion(self, section_num : int) -> int:
+        """Get the number of times a section has been replaced or removed.
+
+            Params:
+                section_num (int): the section number
+        """
+        with self.lock:
+            return self.versions.get(section_num, 0)
+
+    def put(self, section_num : int, section, version : int = None):
+        """Add a section to the cache (evicts the least recently used sections if over budget).
+
+            Params:
+                section_num (int): the section number
+                section (Section): the section (must not be edited after it is added)
+                version (int): ignore the section if the version has changed since it was read
+        """
+        size = getSectionSize(section)
+        with self.lock:
+            if version is None:
+                self.versions[section_num] = self.versions.get(section_num, 0) + 1
+            elif self.versions.get(section_num, 0) != version:
+                return
+            self._remove(section_num)
+            if size > self.max_bytes:
+                return
+            self.sections[section_num] = (section, size)
+            self.nbytes += size
+            self._evict()
+
+    def contains(self, section_num : int) -> bool:
+        """Check if a section is in the cache (does not count as a use).
+
+            Params:
+                section_num (int): the section number
+        """
+        with self.lock:
+            return section_num in self.sections
+
+    def setMaxBytes(self, max_bytes : int):
+        """Set the memory budget for the cache.
+
+            Params:
+                max_bytes (int): the new memory budget
+        """
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self, section_num : int = None):
+        """Remove sections from the cache.
+
+            Params:
+                section_num (int): only remove this section (all sections if None)
+        """
+        with self.lock:
+            if section_num is None:
+                for n in self.sections:
+                    self.versions[n] = self.versions.get(n, 0) + 1
+                self.sections.clear()
+                self.nbytes = 0
+            else:
+                self.versions[section_num] = self.versions.get(section_num, 0) + 1
+                self._remove(section_num)
+
+    def _remove(self, section_num : int):
+        """Remove a section if it is cached (lock must be held)."""
+        item = self.sections.pop(section_num, None)
+        if item is not None:
+            self.nbytes -= item[1]
+
+    def _evict(self):
+        """Remove the least recently used sections until within budget (lock must be held)."""
+        while self.nbytes > self.max_bytes and self.sections:
+            _, (section, size) = self.sections.popitem(last=False)
+            self.nbytes -= size
+
+def getSectionSize(section) -> int:
+    """Estimate the number of bytes used by a section.
+
+        Params:
+            section (Section): the section
+    """
+    size = section_bytes
+    for contour in section.contours.values():
+        for trace in contour:
+            size += trace_bytes + point_bytes * trace.getPointCount()
+    return size
@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+class SectionWriter():
+
+    def __init__(self):
+        """Write saved sections to their files in the background.
+
+        Each save adds a snapshot of the section. A section that is saved again
+        before it is written only has its latest snapshot written. The worker
+        thread runs while there are snapshots to write.
+        """
+        self.pending = OrderedDict()  # snum : (section, binary)
+        self.writing = None  # the section number being written
+        self.error = None
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def _start(self):
+        """Start the worker thread if it is not running (lock must be held)."""
+        if self.thread is None:
+            # not a daemon thread, so the pending sections are written before exiting
+            self.thread = threading.Thread(target=self._run)
+            self.thread.start()
+
+    def _run(self):
+        """Write the pending sections (worker thread)."""
+        while True:
+            with self.condition:
+                if not self.pending:
+                    self.thread = None
+                    self.condition.notify_all()
+                    return
+                snum, (section, binary) = self.pending.popitem(last=False)
+                self.writing = snum
+            try:
+                section.writeFile(binary)
+            except Exception as e:
+                with self.condition:
+                    self.error = e
+            with self.condition:
+                self.writing = None
+                self.condition.notify_all()
+
+    def put(self, section, binary=False):
+        """Queue a section to be written.
+
+            Params:
+                section: the snapshot of the section (must not be edited after it is added)
+                binary (bool): True if the binary format should be used
+        """
+        with self.condition:
+            self.pending.pop(section.n, None)
+            self.pending[section.n] = (section, binary)
+            self._start()
+
+    def isPending(self, section_num : int = None) -> bool:
+        """Check if sections have not been written yet.
+
+            Params:
+                section_num (int): the section to check (any section if None)
+        """
+        with self.condition:
+            return self._isPending(section_num)
+
+    def _isPending(self, section_num : int = None) -> bool:
+        """Check if sections have not been written yet (lock must be held)."""
+        if section_num is None:
+            return bool(self.pending) or self.writing is not None
+        else:
+            return section_num in self.pending or self.writing == section_num
+
+    def wait(self, section_num : int = None):
+        """Wait until sections are written.
+
+        Raises the first error from writing the sections if waiting for all of them.
+
+            Params:
+                section_num (int): the section to wait for (all sections if None)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda : not self._isPending(section_num))
+            if section_num is None and self.error is not None:
+                error, self.error = self.error, None
+                raise error
+
+    def cancel(self, section_num : int = None):
+        """Drop sections that have not been written yet (and wait for the one being written).
+
+            Params:
+                section_num (int): the section to drop (all sections if None)
+        """
+        with self.condition:
+            if section_num is None:
+                self.pending.clear()
+                self.error = None
+            else:
+                self.pending.pop(section_num, None)
+            self.condition.wait_for(lambda : not self._isPending(section_num))
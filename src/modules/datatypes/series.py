@@ -1,6 +1,8 @@
 import os
 import json
 import shutil
+import threading
+import concurrent.futures
 from datetime import datetime
 
 from .ztrace import Ztrace
@@ -9,6 +11,12 @@ from .trace import Trace
 from .transform import Transform
 from .obj_group_dict import ObjGroupDict
 from .object_table_item import ObjectTableItem
+from .jser_reader import JserReader
+from .jser_container import JserContainer, JserContainerWriter
+from .section_binary import isBinarySection, loadSectionData
+from .section_cache import SectionCache
+from .section_writer import SectionWriter
+from . import batch_edit
 
 from modules.constants import (
     createHiddenDir,
@@ -45,6 +53,14 @@ class Series():
         self.hidden_dir = os.path.dirname(self.filepath)
         self.modified = False
 
+        # section locations in the jser and section metadata
+        self.extract_lock = threading.Lock()
+        self.loadIndex()
+        # sections that have changed since the jser was saved
+        self.modified_sections = set(
+            n for n in self.sections if n not in self.jser_index
+        )
+
         self.current_section = series_data["current_section"]
         self.src_dir = series_data["src_dir"]
         self.screen_mag = 0  # default value for screen mag (will be calculated when generateView called)
@@ -76,19 +92,25 @@ class Series():
 
         self.options = series_data["options"]
 
+        # recently used sections (and sections loaded in advance by the prefetcher)
+        self.section_cache = SectionCache(self.options["section_cache_size"] * 1024**2)
+        # saved sections waiting to be written to their files
+        self.section_writer = SectionWriter()
+
         # gather thickness, mag, and tforms for each section
         self.gatherSectionData()
     
-    def gatherSectionData(self):
-        """Get the mag, thickness, and transforms from each section."""
-        # THIS IS DONE THROUGH THE JSON METHOD TO SPEED IT UP
-        for n, section in self.sections.items():
-            filepath = os.path.join(
-                self.getwdir(),
-                section
-            )
-            with open(filepath, "r") as f:
-                section_json = json.load(f)
+    def gatherSectionData(self, section_numbers : list = None):
+        """Get the mag, thickness, and transforms from each section.
+        
+            Params:
+                section_numbers (list): the sections to update (all sections if None)
+        """
+        if section_numbers is None:
+            section_numbers = self.sections.keys()
+        # THIS IS DONE THROUGH THE METADATA INDEX TO SPEED IT UP
+        for n in section_numbers:
+            section_json = self.section_metadata[n]
             self.section_thicknesses[n] = section_json["thickness"]
             self.section_mags[n] = section_json["mag"]
             tforms = {}
@@ -98,91 +120,70 @@ class Series():
     
     # OPENING, LOADING, AND MOVING THE JSER FILE
     # STATIC METHOD
-    def openJser(fp : str):
+    def openJser(fp : str, extract_all=False):
         """Process the file containing all section and series information.
+
+        By default, only the series and the section metadata are read. The
+        location of each section in the jser is saved to an index in the hidden
+        folder and the section is extracted the first time it is loaded.
         
             Params:
                 fp (str): the filepath
+                extract_all (bool): True if every section should be extracted immediately
         """
-        # load json
-        with open(fp, "r") as f:
-            jser_data = json.load(f)
-        
-        # UPDATE FROM OLD JSER FORMATS
-        updated_jser_data = {}
-        sections_dict = {}
-        if "sections" not in jser_data and "series" not in jser_data:
-            # gather the sections and section numbers
-            for key in jser_data:
-                # key could just be the extension OR the name + extension
-                if "." in key:
-                    ext = key[key.rfind(".")+1:]
-                else:
-                    ext = key
-                # check if section or series data
-                if ext.isnumeric():
-                    snum = int(ext)
-                    sections_dict[snum] = jser_data[key]
-                else:
-                    updated_jser_data["series"] = jser_data[key]
-            # organize the sections in a list
-            sections_list = [None] * (max(sections_dict.keys())+1)
-            for snum, sdata in sections_dict.items():
-                sections_list[snum] = sdata
-            updated_jser_data["sections"] = sections_list
-            # replace data
-            jser_data = updated_jser_data
-        
         # creating loading bar
         update, canceled = progbar(
             "Open Series",
             "Loading series..."
         )
-        progress = 0
-        final_value = 1
-        for sdata in jser_data["sections"]:
-            if sdata: final_value += 1
 
         # create the hidden directory
         sdir = os.path.dirname(fp)
         sname = os.path.basename(fp)
         sname = sname[:sname.rfind(".")]
         hidden_dir = createHiddenDir(sdir, sname)
-        
-        # extract JSON series data
-        series_data = jser_data["series"]
-        Series.updateJSON(series_data)
         series_fp = os.path.join(hidden_dir, sname + ".ser")
-        with open(series_fp, "w") as f:
-            json.dump(series_data, f)
-        if canceled and canceled():
-            return None
-        progress += 1
-        if update: update(progress/final_value * 100)
 
-        # extract JSON section data
         sections = {}
-        for snum, section_data in enumerate(jser_data["sections"]):
-            # check for empty section, skip if so
-            if section_data is None:
-                continue
-
-            filename = sname + "." + str(snum)
-            section_fp = os.path.join(hidden_dir, filename)
+        jser_index = {}
+        metadata = {}
+        series_found = False
+        for key, data, section_index, progress in Series.readJser(fp, extract_all):
+            # extract JSON series data
+            if key == "series":
+                Series.updateJSON(data)
+                with open(series_fp, "w") as f:
+                    json.dump(data, f)
+                series_found = True
+            # extract JSON section data
+            else:
+                # gather the section numbers and section filenames
+                sections[key] = sname + "." + str(key)
 
-            Section.updateJSON(section_data)  # update any missing attributes
+                # the location of the section and its metadata are stored separately
+                location = {
+                    k : section_index.pop(k) for k in ("range", "member")
+                    if k in section_index
+                }
+                metadata[key] = section_index
 
-            # gather the section numbers and section filenames
-            sections[snum] = filename
-                
-            with open(section_fp, "w") as f:
-                json.dump(section_data, f)
+                if extract_all:
+                    Section.updateJSON(data)  # update any missing attributes
+                    section_fp = os.path.join(hidden_dir, sections[key])
+                    with open(section_fp, "w") as f:
+                        json.dump(data, f)
+                else:
+                    jser_index[key] = location
             
             if canceled and canceled():
                 return None
-            progress += 1
             if update:
-                update(progress/final_value * 100)
+                update(progress * 100)
+        
+        if not series_found:
+            raise ValueError(f"No series data found in {fp}")
+        
+        Series.writeIndex(hidden_dir, sname, fp, jser_index, metadata)
         
         # create the series
         series = Series(series_fp, sections)
@@ -190,12 +191,280 @@ class Series():
         
         return series
 
-    def saveJser(self, close=False):
-        """Save the jser file."""
-        jser_data = {}
+    # STATIC METHOD
+    def readJser(fp : str, extract_all=False):
+        """Yield the key, data, index, and progress for the series and each section in a jser.
+        
+            Params:
+                fp (str): the filepath of the jser
+                extract_all (bool): True if the section data should be read (only the metadata otherwise)
+        """
+        if JserContainer.isContainer(fp):
+            # the manifest contains the series and the section metadata
+            container = JserContainer(fp)
+            yield "series", container.series_data, None, 0
+            for i, (snum, section_index) in enumerate(container.sections.items()):
+                data = container.readSection(snum) if extract_all else None
+                yield snum, data, dict(section_index), (i + 1) / len(container.sections)
+            container.close()
+        else:
+            # read the JSON one section at a time
+            reader = JserReader(fp, skip_keys=None if extract_all else {"contours"})
+            for key, data, start, end in reader:
+                section_index = None
+                if key != "series":
+                    contours_read = "contours" in data
+                    Section.updateJSON(data)  # update any missing attributes
+                    section_index = dict(Section.getMetadata(data), range=[start, end])
+                    # the objects on the section are not known until it is read
+                    if not contours_read:
+                        del(section_index["contours"])
+                yield key, data, section_index, reader.getProgress()
 
-        filenames = os.listdir(self.hidden_dir)
+    # STATIC METHOD
+    def writeIndex(hidden_dir : str, sname : str, jser_fp : str, jser_index : dict, metadata : dict):
+        """Write the section locations and metadata to the hidden folder.
+        
+            Params:
+                hidden_dir (str): the hidden folder of the series
+                sname (str): the name of the series
+                jser_fp (str): the jser file the series was opened from or saved to
+                jser_index (dict): snum : location (byte range or member) for each unextracted section
+                metadata (dict): snum : metadata for each section
+        """
+        index_fp = os.path.join(hidden_dir, sname + ".index")
+        # replace the index once it is fully written (it is the only record of the unextracted sections)
+        with open(index_fp + ".tmp", "w") as f:
+            json.dump({
+                "jser_fp": jser_fp,
+                "sections": jser_index,
+                "metadata": metadata
+            }, f)
+        os.replace(index_fp + ".tmp", index_fp)
+    
+    def rebuildIndex(self) -> dict:
+        """Read the section locations and metadata from the jser that the series was opened from.
 
+        Used if the index file is missing or damaged.
+        
+            Returns:
+                (dict): the index data (None if the jser is not found)
+        """
+        jser_fp = os.path.join(os.path.dirname(self.hidden_dir), self.name + ".jser")
+        if not os.path.isfile(jser_fp):
+            return None
+        jser_index = {}
+        metadata = {}
+        for key, data, section_index, progress in Series.readJser(jser_fp):
+            if key == "series":
+                continue
+            jser_index[key] = {
+                k : section_index.pop(k) for k in ("range", "member")
+                if k in section_index
+            }
+            metadata[key] = section_index
+        return {
+            "jser_fp": jser_fp,
+            "sections": jser_index,
+            "metadata": metadata
+        }
+    
+    def loadIndex(self):
+        """Load the section locations in the jser and the section metadata.
+        
+        The metadata is read from the section files for any sections that are
+        missing from the index (e.g. a new series).
+        """
+        self.jser_index = {}
+        self.jser_index_fp = ""
+        self.section_metadata = {}
+        self.index_modified = False
+        index_fp = os.path.join(self.hidden_dir, self.name + ".index")
+        index_data = None
+        if os.path.isfile(index_fp):
+            try:
+                with open(index_fp, "r") as f:
+                    index_data = json.load(f)
+                for key in ("jser_fp", "sections", "metadata"):
+                    index_data[key]
+            except (ValueError, KeyError, TypeError):
+                index_data = None  # damaged
+        rebuilt = False
+        if index_data is None and any(
+            not os.path.isfile(os.path.join(self.hidden_dir, filename))
+            for filename in self.sections.values()
+        ):
+            # the unextracted sections can only be found in the jser
+            index_data = self.rebuildIndex()
+            rebuilt = index_data is not None
+        if index_data is not None:
+            self.jser_index_fp = index_data["jser_fp"]
+            for snum, section_index in index_data["sections"].items():
+                snum = int(snum)
+                filename = self.name + "." + str(snum)
+                # skip sections that have already been extracted
+                if os.path.isfile(os.path.join(self.hidden_dir, filename)):
+                    continue
+                self.jser_index[snum] = section_index
+                self.sections[snum] = filename
+            # the index is saved after the section files, so it may be older after a crash
+            index_mtime = os.path.getmtime(index_fp) if not rebuilt else 0
+            for snum, metadata in index_data["metadata"].items():
+                snum = int(snum)
+                if snum not in self.sections:
+                    continue
+                section_fp = os.path.join(self.hidden_dir, self.sections[snum])
+                if os.path.isfile(section_fp) and os.path.getmtime(section_fp) > index_mtime:
+                    continue
+                self.section_metadata[snum] = metadata
+        
+        # read any missing metadata from the sections
+        missing = [n for n in self.sections if n not in self.section_metadata]
+        for n in missing:
+            self.extractSection(n)
+            with open(os.path.join(self.hidden_dir, self.sections[n]), "rb") as f:
+                section_data = loadSectionData(f.read())
+            Section.updateJSON(section_data)
+            self.section_metadata[n] = Section.getMetadata(section_data)
+        if (missing or rebuilt) and not self.isWelcomeSeries():
+            self.saveIndex()
+        
+        self.buildObjectIndex()
+    
+    def saveIndex(self):
+        """Save the section locations in the jser and the section metadata."""
+        self.index_modified = False
+        Series.writeIndex(
+            self.hidden_dir,
+            self.name,
+            self.jser_index_fp,
+            dict(self.jser_index),
+            dict(self.section_metadata)
+        )
+    
+    def setSectionMetadata(self, section_num : int, metadata : dict, save_index=True):
+        """Update the metadata for a section (called when the section is saved).
+        
+            Params:
+                section_num (int): the section number
+                metadata (dict): the metadata for the section
+                save_index (bool): False if the index file will be saved later
+        """
+        self.removeFromObjectIndex(section_num)
+        self.section_metadata[section_num] = metadata
+        self.addToObjectIndex(section_num)
+        if save_index:
+            self.saveIndex()
+        else:
+            self.index_modified = True
+    
+    def buildObjectIndex(self):
+        """Create the index of the sections that contain each object (from the section metadata)."""
+        self.object_sections = {}  # object name : set of section numbers
+        self.unindexed_sections = set()  # sections without object names in the metadata
+        for snum in self.section_metadata:
+            self.addToObjectIndex(snum)
+    
+    def addToObjectIndex(self, section_num : int):
+        """Add the objects on a section to the object index.
+        
+            Params:
+                section_num (int): the section number
+        """
+        obj_names = self.section_metadata[section_num].get("contours")
+        if obj_names is None:
+            self.unindexed_sections.add(section_num)
+            return
+        for name in obj_names:
+            if name not in self.object_sections:
+                self.object_sections[name] = set()
+            self.object_sections[name].add(section_num)
+    
+    def removeFromObjectIndex(self, section_num : int):
+        """Remove the objects on a section from the object index.
+        
+            Params:
+                section_num (int): the section number
+        """
+        if section_num not in self.section_metadata:
+            return
+        obj_names = self.section_metadata[section_num].get("contours")
+        if obj_names is None:
+            self.unindexed_sections.discard(section_num)
+            return
+        for name in obj_names:
+            if name in self.object_sections:
+                self.object_sections[name].discard(section_num)
+                if not self.object_sections[name]:
+                    del(self.object_sections[name])
+    
+    def getObjectSections(self, obj_names : list) -> list:
+        """Get the sections that contain any of a set of objects.
+
+        Sections that are not in the object index yet (from a jser opened
+        without reading the traces) are read and indexed first.
+        
+            Params:
+                obj_names (list): the object names
+            Returns:
+                (list): the sorted section numbers
+        """
+        if self.unindexed_sections:
+            for snum, section in self.enumerateSections(
+                message="Indexing objects...",
+                section_numbers=sorted(self.unindexed_sections)
+            ):
+                self.unindexed_sections.discard(snum)
+                self.section_metadata[snum] = dict(
+                    self.section_metadata[snum],
+                    contours=section.getObjectNames()
+                )
+                self.addToObjectIndex(snum)
+            if not self.isWelcomeSeries():
+                self.saveIndex()
+        
+        section_numbers = set()
+        for name in obj_names:
+            section_numbers |= self.object_sections.get(name, set())
+        return sorted(section_numbers)
+    
+    def extractSection(self, section_num : int):
+        """Write a section from the jser to the hidden folder if it has not been extracted yet (thread safe).
+        
+            Params:
+                section_num (int): the section number
+        """
+        with self.extract_lock:
+            if section_num not in self.jser_index:
+                return
+            # copy the section as stored (JSON or binary)
+            section_index = self.jser_index[section_num]
+            if "member" in section_index:
+                container = JserContainer(self.jser_index_fp)
+                section_bytes = container.readMember(section_index["member"])
+                container.close()
+            else:
+                start, end = section_index["range"]
+                with open(self.jser_index_fp, "rb") as f:
+                    f.seek(start)
+                    section_bytes = f.read(end - start)
+
+            # write to a temporary file first so that a partial file is never used
+            section_fp = os.path.join(self.hidden_dir, self.sections[section_num])
+            with open(section_fp + ".tmp", "wb") as f:
+                f.write(section_bytes)
+            os.replace(section_fp + ".tmp", section_fp)
+
+            del(self.jser_index[section_num])
+
+    def saveJser(self, close=False):
+        """Save the jser file.
+
+        If the series was opened from (or last saved to) the same container,
+        only the modified sections and the series data are added to it. The
+        container is rewritten instead when most of it is left over from
+        previous saves.
+        """
         if prog_imported:
             update, canceled = progbar(
                 "Save Series",
@@ -205,32 +474,91 @@ class Series():
         else:
             update, canceled = None, None
         progress = 0
-        final_value = len(filenames)
+        final_value = len(self.sections) + 1
 
-        # get the max section number
-        sections_len = max(self.sections.keys())+1
-        jser_data["sections"] = [None] * sections_len
+        # the section files must be written before they are copied
+        self.flushSections()
 
-        for filename in filenames:
-            if "." not in filename:  # skip the timer file
-                continue
-            fp = os.path.join(self.hidden_dir, filename)
-            with open(fp, "r") as f:
-                filedata = json.load(f)
-            ext = filename[filename.rfind(".")+1:]
+        with open(self.filepath, "r") as f:
+            series_data = json.load(f)
 
-            if ext.isnumeric():
-                jser_data["sections"][int(ext)] = filedata
-            else:
-                jser_data["series"] = filedata
+        # sections cannot be extracted while the jser is being written
+        with self.extract_lock:
+            # the file the unmodified sections are stored in
+            source = None
+            if JserContainer.isContainer(self.jser_index_fp):
+                source = JserContainer(self.jser_index_fp)
+            append = bool(
+                source and
+                os.path.isfile(self.jser_fp) and
+                os.path.samefile(source.fp, self.jser_fp) and
+                not source.needsCompaction()
+            )
+            writer = JserContainerWriter(
+                self.jser_fp,
+                source.save_num + 1 if source else 0,
+                append,
+                self.options["jser_compression"]
+            )
 
-            if update: update(progress/final_value * 100)
-            progress += 1
-        
-        save_str = json.dumps(jser_data)
+            try:
+                for snum in sorted(self.sections.keys()):
+                    in_source = source and snum in source.sections
+                    if snum in self.modified_sections or (snum not in self.jser_index and not in_source):
+                        # write the section from the hidden folder
+                        fp = os.path.join(self.hidden_dir, self.sections[snum])
+                        with open(fp, "rb") as f:
+                            section_bytes = f.read()
+                        # the indentation is only worth removing if not compressed
+                        if writer.compression == "none" and not isBinarySection(section_bytes):
+                            section_bytes = json.dumps(json.loads(section_bytes)).encode()
+                        writer.writeSection(
+                            snum,
+                            section_bytes,
+                            self.section_metadata[snum]
+                        )
+                    elif append:
+                        # unchanged section already in the container
+                        writer.keepSection(snum, source.sections[snum])
+                    elif in_source:
+                        # copy the section from the previous container
+                        section_index = source.sections[snum]
+                        writer.writeSection(
+                            snum,
+                            source.readMember(section_index["member"]),
+                            section_index
+                        )
+                    else:
+                        # copy the section from the JSON jser
+                        start, end = self.jser_index[snum]["range"]
+                        with open(self.jser_index_fp, "rb") as f:
+                            f.seek(start)
+                            section_bytes = f.read(end - start)
+                        writer.writeSection(
+                            snum,
+                            section_bytes,
+                            self.section_metadata[snum]
+                        )
 
-        with open(self.jser_fp, "w") as f:
-            f.write(save_str)
+                    if update: update(progress/final_value * 100)
+                    progress += 1
+            
+                if source:
+                    source.close()
+                writer.close(series_data)
+            except BaseException:
+                if source:
+                    source.close()
+                writer.abort()
+                raise
+        
+            # the unextracted sections are now in the saved jser
+            for snum in self.jser_index:
+                self.jser_index[snum] = {"member": writer.sections[snum]["member"]}
+            self.jser_index_fp = self.jser_fp
+            self.modified_sections = set()
+            if not close:
+                self.saveIndex()
         
         # backup the series if requested
         if self.options["backup_dir"] and os.path.isdir(self.options["backup_dir"]):
@@ -245,8 +573,7 @@ class Series():
                 self.options["backup_dir"],
                 fn
             )
-            with open(backup_fp, "w") as f:
-                f.write(save_str)
+            shutil.copyfile(self.jser_fp, backup_fp)
         else:
             self.options["backup_dir"] = ""
         
@@ -263,6 +590,10 @@ class Series():
                 section (Section): the section file being used
                 b_section (Section): the secondary section file being used
             """
+        # cached sections point to the old files
+        self.flushSections()
+        self.uncacheSection()
+
         # move/rename the hidden directory
         old_name = self.name
         new_name = os.path.basename(new_jser_fp)
@@ -310,6 +641,8 @@ class Series():
     
     def close(self):
         """Clear the hidden directory of the series."""
+        self.section_writer.cancel()
+        self.uncacheSection()
         if os.path.isdir(self.hidden_dir):
             for f in os.listdir(self.hidden_dir):
                 os.remove(os.path.join(self.hidden_dir, f))
@@ -438,6 +771,10 @@ class Series():
         options["show_ztraces"] = True
         options["backup_dir"] = ""
         options["fill_opacity"] = 0.2
+        options["prefetch_depth"] = 1
+        options["section_cache_size"] = 256  # MB
+        options["section_format"] = "json"  # "json" or "binary"
+        options["jser_compression"] = "zstd"  # "zstd", "deflate", or "none"
 
         return series_data
     
@@ -502,20 +839,219 @@ class Series():
     
     def loadSection(self, section_num : int) -> Section:
         """Load a section object.
+
+        Sections are kept in a cache, so the returned section is a copy that
+        can be edited without affecting other loaded copies until it is saved.
         
             Params:
                 section_num (int): the section number
         """
-        section = Section(section_num, self)
+        cached = self.section_cache.get(section_num)
+        if cached is None:
+            version = self.section_cache.getVersion(section_num)
+            self.section_writer.wait(section_num)
+            self.extractSection(section_num)
+            cached = Section(section_num, self)
+            self.section_cache.put(section_num, cached, version)
+        section = cached.copy()
         # update transform data
         self.section_tforms[section.n] = section.tforms
         self.section_mags[section.n] = section.mag
         self.section_thicknesses[section.n] = section.thickness
         return section
     
-    def enumerateSections(self, show_progress=True, message="Loading series data..."):
-        """Allow iteration through the sections."""
-        return SeriesIterator(self, show_progress, message)
+    def preloadSection(self, section_num : int):
+        """Load a section into the cache so that loadSection does not have to read it (thread safe).
+        
+            Params:
+                section_num (int): the section number
+        """
+        if self.section_cache.contains(section_num):
+            return
+        version = self.section_cache.getVersion(section_num)
+        self.section_writer.wait(section_num)
+        try:
+            self.extractSection(section_num)
+            section = Section(section_num, self)
+        except (OSError, ValueError, KeyError):
+            return
+        # ignored if the section was saved while reading
+        self.section_cache.put(section_num, section, version)
+    
+    def getCachedSection(self, section_num : int) -> Section:
+        """Get a cached section without copying it (None if not cached). The section must not be edited.
+        
+            Params:
+                section_num (int): the section number
+        """
+        return self.section_cache.get(section_num)
+    
+    def saveSection(self, section : Section):
+        """Replace the cached copy of a section and queue its file to be written (called by Section.save).
+        
+            Params:
+                section (Section): the saved section
+        """
+        snapshot = section.copy()
+        self.section_cache.put(section.n, snapshot)
+        self.section_writer.put(
+            snapshot,
+            binary=(self.options["section_format"] == "binary")
+        )
+    
+    def flushSections(self):
+        """Wait until the saved sections are written to their files (and save the index if it has changed)."""
+        self.section_writer.wait()
+        if self.index_modified and not self.isWelcomeSeries():
+            self.saveIndex()
+    
+    def uncacheSection(self, section_num : int = None):
+        """Remove sections from the cache.
+        
+            Params:
+                section_num (int): the section to remove (all sections if None)
+        """
+        self.section_cache.clear(section_num)
+    
+    def deleteSection(self, section_num : int):
+        """Delete a section file from the series.
+        
+            Params:
+                section_num (int): the section number
+        """
+        self.section_writer.cancel(section_num)
+        self.uncacheSection(section_num)
+        with self.extract_lock:
+            if section_num in self.jser_index:
+                del(self.jser_index[section_num])
+            else:
+                os.remove(os.path.join(self.getwdir(), self.sections[section_num]))
+            self.modified_sections.discard(section_num)
+            self.removeFromObjectIndex(section_num)
+            del(self.sections[section_num])
+            del(self.section_metadata[section_num])
+            self.saveIndex()
+    
+    def enumerateSections(self, show_progress=True, message="Loading series data...", section_numbers : list = None):
+        """Allow iteration through the sections.
+        
+            Params:
+                show_progress (bool): show progress dialog if True
+                message (str): the message for the progress dialog
+                section_numbers (list): the sections to iterate through (all sections if None)
+        """
+        return SeriesIterator(self, show_progress, message, section_numbers)
+    
+    def editSections(self, fn, section_args : dict, message="Modifying sections...") -> dict:
+        """Run an edit on a set of sections.
+
+        Large edits are run on the section files in a pool of worker processes.
+        The edit must be a module-level function (see batch_edit) that takes
+        the section and the arguments for that section, modifies the section,
+        and returns (modified, result). It must not use the series: in a worker,
+        the section is not attached to one. If cancelled, the sections that
+        were already edited keep their changes.
+        
+            Params:
+                fn (function): the edit
+                section_args (dict): snum : the tuple of arguments for each section to edit
+                message (str): the message for the progress dialog
+            Returns:
+                (dict): snum : the result of the edit for each section that was edited
+        """
+        section_numbers = sorted(section_args.keys())
+        results = {}
+
+        # small edits are done here
+        if (
+            len(section_numbers) < batch_edit.min_parallel_sections or
+            batch_edit.getWorkerCount() < 2 or
+            self.isWelcomeSeries()
+        ):
+            for snum, section in self.enumerateSections(
+                message=message,
+                section_numbers=section_numbers
+            ):
+                modified, results[snum] = fn(section, *section_args[snum])
+                if modified:
+                    section.save()
+            return results
+        
+        # the workers read and write the section files directly
+        self.flushSections()
+        for snum in section_numbers:
+            self.extractSection(snum)
+        binary = self.options["section_format"] == "binary"
+
+        if prog_imported:
+            update, canceled = progbar(
+                title=" ",
+                text=message
+            )
+        else:
+            update, canceled = None, None
+        
+        pool = batch_edit.getPool()
+        futures = [
+            pool.submit(
+                batch_edit.editSectionFile,
+                snum,
+                os.path.join(self.hidden_dir, self.sections[snum]),
+                binary,
+                fn,
+                section_args[snum]
+            )
+            for snum in section_numbers
+        ]
+        modified_sections = []
+        def applyResult(future):
+            snum, metadata, result = future.result()
+            results[snum] = result
+            if metadata is not None:
+                # the cached copy is out of date
+                self.uncacheSection(snum)
+                self.modified_sections.add(snum)
+                self.setSectionMetadata(snum, metadata, save_index=False)
+                modified_sections.append(snum)
+        
+        applied = set()
+        try:
+            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                applied.add(future)
+                applyResult(future)
+                if update:
+                    update((i + 1) / len(futures) * 100)
+                if canceled and canceled():
+                    break
+        finally:
+            # stop the edits that have not started and keep the ones that finished
+            for future in futures:
+                future.cancel()
+            concurrent.futures.wait(futures)
+            for future in futures:
+                if future not in applied and not future.cancelled() and future.exception() is None:
+                    applyResult(future)
+            self.gatherSectionData(modified_sections)
+            self.saveIndex()
+            if update:
+                update(100)
+
+        return results
+    
+    def updateObjectTableData(self, table_data : dict, results : dict):
+        """Replace the object table data for the sections returned by an edit.
+        
+            Params:
+                table_data (dict): name : ObjectTableItem for each object
+                results (dict): snum : (name : ObjectTableItem for the section) from the edit
+        """
+        for snum, section_data in results.items():
+            if not section_data:
+                continue
+            for name, item in section_data.items():
+                if name not in table_data:
+                    table_data[name] = ObjectTableItem(name)
+                table_data[name].data[snum] = item.data[snum]
     
     def newAlignment(self, alignment_name : str, base_alignment="default"):
         """Create a new alignment.
@@ -557,36 +1093,25 @@ class Series():
         if obj_name in self.ztraces:
             del(self.ztraces[obj_name])
 
+        # get the midpoints of the contour (if cross-sectioned) or of each trace on every section
+        section_points = self.editSections(
+            batch_edit.getObjectPointsOnSection,
+            {snum : (obj_name, cross_sectioned) for snum in self.getObjectSections([obj_name])},
+            message="Creating ztrace..."
+        )
         color = None
+        dt_points = []
+        for snum in sorted(section_points.keys()):
+            for dt, midpoint, trace_color in section_points[snum]:
+                if not color: color = trace_color
+                dt_points.append((snum, dt, (*midpoint, snum)))
         
         # if cross-sectioned object (if create on midpoints), make one point per section
         if cross_sectioned:
-            points = []
-            for snum, section in self.enumerateSections(
-                message="Creating ztrace..."
-            ):
-                if obj_name in section.contours:
-                    if not color: color = section.contours[obj_name][0].color
-                    contour = section.contours[obj_name]
-                    p = (*contour.getMidpoint(), snum)
-                    points.append(p)
-                    
+            points = [dtp[2] for dtp in dt_points]
         # otherwise, make points by trace history by section
         # each trace gets its own point, ztrace points are in chronological order based on trace history
         else:
-            dt_points = []
-            for snum, section in self.enumerateSections(
-                message="Creating ztrace..."
-            ):
-                if obj_name in section.contours:
-                    contour = section.contours[obj_name]
-                    for trace in contour:
-                        if not color: color = trace.color
-                        # get the trace creation datetime
-                        dt = trace.history[0].dt
-                        # get the midpoint
-                        p = (*trace.getMidpoint(), snum)
-                        dt_points.append((snum, dt, p))
             # sort the points by datetime
             dt_points.sort()
             points = [dtp[2] for dtp in dt_points]
@@ -630,21 +1155,15 @@ class Series():
             Params:
                 obj_names (list): the objects to delete
         """
-        for snum, section in self.enumerateSections(
+        self.editSections(
+            batch_edit.deleteObjectsOnSection,
+            {snum : (obj_names,) for snum in self.getObjectSections(obj_names)},
             message="Deleting object(s)..."
-        ):
-            modified = False
-            for obj_name in obj_names:
-                if obj_name in section.contours:
-                    del(section.contours[obj_name])
-                    modified = True
-            
-            if modified:
-                section.save()
+        )
         
         self.modified = True
     
-    def editObjectAttributes(self, obj_names : list, name : str = None, color : tuple = None, tags : set = None, mode : tuple = None, addTrace=None):
+    def editObjectAttributes(self, obj_names : list, name : str = None, color : tuple = None, tags : set = None, mode : tuple = None, table_data : dict = None):
         """Edit the attributes of objects on every section.
         
             Params:
@@ -652,56 +1171,40 @@ class Series():
                 obj_names (list): the names of the objects to rename
                 name (str): the new name for the objects
                 color (tuple): the new color for the objects
-                addTrace (function): for object table updating purposes
+                table_data (dict): name : ObjectTableItem (the data for the modified sections is replaced)
         """
-        # modify the object on every section
-        for snum, section in self.enumerateSections(
+        # modify the object on every section that contains it
+        results = self.editSections(
+            batch_edit.editObjectAttributesOnSection,
+            {
+                snum : (obj_names, name, color, tags, mode, self.alignment if table_data is not None else None)
+                for snum in self.getObjectSections(obj_names)
+            },
             message="Modifying object(s)..."
-        ):
-            traces = []
-            for obj_name in obj_names:
-                if obj_name in section.contours:
-                    traces += section.contours[obj_name].getTraces()
-            if traces:
-                section.editTraceAttributes(traces, name, color, tags, mode, add_tags=True)
-                # gather new traces
-                if name:
-                    traces = section.contours[name].getTraces()
-                else:
-                    traces = []
-                    for obj_name in obj_names:
-                        if obj_name in section.contours:
-                            traces += section.contours[obj_name].getTraces()
-                # add trace data to table data
-                if addTrace:
-                    for trace in traces:
-                        addTrace(trace, section, snum)
-                section.save()
+        )
+        if table_data is not None:
+            self.updateObjectTableData(table_data, results)
         
         self.modified = True
     
-    def editObjectRadius(self, obj_names : list, new_rad : float, addTrace=None):
+    def editObjectRadius(self, obj_names : list, new_rad : float, table_data : dict = None):
         """Change the radii of all traces of an object.
         
             Params:
                 obj_names (list): the names of objects to modify
                 new_rad (float): the new radius for the traces of the object
-                addTrace (function): for object table updating purposes
+                table_data (dict): name : ObjectTableItem (the data for the modified sections is replaced)
         """
-        for snum, section in self.enumerateSections(
+        results = self.editSections(
+            batch_edit.editObjectRadiusOnSection,
+            {
+                snum : (obj_names, new_rad, self.alignment if table_data is not None else None)
+                for snum in self.getObjectSections(obj_names)
+            },
             message="Modifying radii..."
-        ):
-            traces = []
-            for name in obj_names:
-                if name in section.contours:
-                    traces += section.contours[name].getTraces()
-            if traces:
-                section.editTraceRadius(traces, new_rad)
-                # add trace data to table data
-                if addTrace:
-                    for trace in traces:
-                        addTrace(trace, section, snum)
-                section.save()
+        )
+        if table_data is not None:
+            self.updateObjectTableData(table_data, results)
         
         self.modified = True
     
@@ -711,22 +1214,11 @@ class Series():
             Params:
                 obj_names (list): a list of object names
         """
-        for snum, section in self.enumerateSections(
+        self.editSections(
+            batch_edit.removeTraceTagsOnSection,
+            {snum : (obj_names,) for snum in self.getObjectSections(obj_names)},
             message="Removing trace tags..."
-        ):
-            traces = []
-            for obj_name in obj_names:
-                if obj_name in section.contours:
-                    traces += section.contours[obj_name].getTraces()
-            if traces:
-                section.editTraceAttributes(
-                    traces,
-                    name=None,
-                    color=None,
-                    tags=set(),
-                    mode=None, 
-                )
-                section.save()
+        )
 
         self.modified = True
     
@@ -737,18 +1229,11 @@ class Series():
                 obj_names (list): the names of objects to hide
                 hide (bool): True if object should be hidden
         """
-        for snum, section in self.enumerateSections(
+        self.editSections(
+            batch_edit.hideObjectsOnSection,
+            {snum : (obj_names, hide) for snum in self.getObjectSections(obj_names)},
             message="Hiding object(s)..." if hide else "Unhiding object(s)..."
-        ):
-            modified = False
-            for name in obj_names:
-                if name in section.contours:
-                    contour = section.contours[name]
-                    for trace in contour:
-                        trace.setHidden(hide)
-                        modified = True
-            if modified:
-                section.save()
+        )
         
         self.modified = True
     
@@ -810,20 +1295,23 @@ class Series():
 
 class SeriesIterator():
 
-    def __init__(self, series : Series, show_progress : bool, message : str):
+    def __init__(self, series : Series, show_progress : bool, message : str, section_numbers : list = None):
         """Create the series iterator object.
         
             Params:
                 series (Series): the series object
                 show_progress (bool): show progress dialog if True
+                section_numbers (list): the sections to iterate through (all sections if None)
         """
         self.series = series
         self.show_progress = show_progress
         self.message = message
+        self.section_numbers = section_numbers
     
     def __iter__(self):
         """Allow the user to iterate through the sections."""
-        self.section_numbers = sorted(list(self.series.sections.keys()))
+        if self.section_numbers is None:
+            self.section_numbers = sorted(list(self.series.sections.keys()))
         self.sni = 0
         if self.show_progress:
             if prog_imported:
@@ -849,5 +1337,5 @@ class SeriesIterator():
         else:
             if self.show_progress:
                 if self.update:
-                    self.update(self.sni / len(self.section_numbers) * 100)
+                    self.update(100)
             raise StopIteration
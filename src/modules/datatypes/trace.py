@@ -1,3 +1,7 @@
+import math
+import numpy as np
+import cv2
+
 from .transform import Transform
 from .trace_log import TraceLog
 
@@ -9,8 +13,26 @@ from modules.datatypes_legacy import (
     Transform as XMLTransform
 )
 
+# the points of a trace with no points
+no_points = np.empty((0, 2))
+no_points.setflags(write=False)
+
 class Trace():
 
+    # traces are kept for every section in memory (and in the undo states), so no __dict__
+    __slots__ = (
+        "name",
+        "color",
+        "closed",
+        "negative",
+        "_points",
+        "hidden",
+        "tags",
+        "_history",
+        "fill_mode",
+        "_lod"
+    )
+
     def __init__(self, name : str, color : tuple, closed=True):
         """Create a Trace object.
         
@@ -23,23 +45,99 @@ class Trace():
         self.color = color
         self.closed = closed
         self.negative = False
-        self.points = []
+        self._points = no_points  # read-only N x 2 array (shared by copies)
         self.hidden = False  # default to False
         self.tags = set()
-        self.history = []
+        self._history = ()  # tuple of TraceLog (shared by copies)
         self.fill_mode = ("none", "none")
+        self._lod = None  # level : simplified points (shared by copies with the same points)
+    
+    @property
+    def points(self) -> list:
+        """The points of the trace as a list of (x, y) tuples.
+
+        The list is created on each access: changing it does not change the
+        trace. Set the points to change them.
+        """
+        return list(map(tuple, self._points.tolist()))
+    
+    @points.setter
+    def points(self, points):
+        if type(points) is np.ndarray and not points.flags.writeable and points.dtype == float:
+            # already a read-only array (ex. from another trace)
+            self._points = points.reshape(-1, 2)
+        else:
+            points = np.array(points, dtype=float).reshape(-1, 2)
+            points.setflags(write=False)
+            self._points = points
+        self._lod = None
+    
+    @property
+    def history(self) -> tuple:
+        """The history of the trace as a tuple of TraceLog."""
+        return self._history
+    
+    @history.setter
+    def history(self, history):
+        self._history = tuple(history)
+    
+    def getPointArray(self) -> np.ndarray:
+        """Get the points of the trace as an array.
+        
+            Returns:
+                (np.ndarray): the N x 2 points (read-only)
+        """
+        return self._points
+    
+    def getPointCount(self) -> int:
+        """Get the number of points in the trace."""
+        return len(self._points)
+    
+    def getSimplifiedPoints(self, tolerance : float) -> np.ndarray:
+        """Get the points of the trace simplified for drawing (cached).
+
+        The trace is simplified with the largest power of two that is not more
+        than the tolerance, so that each cached level is used for a range of zooms.
+        
+            Params:
+                tolerance (float): the largest distance allowed between the trace and the simplified trace
+            Returns:
+                (np.ndarray): the N x 2 simplified points (read-only)
+        """
+        points = self._points
+        if tolerance <= 0 or len(points) <= 3:
+            return points
+        level = math.floor(math.log2(tolerance))
+        if self._lod is None:
+            self._lod = {}
+        simplified = self._lod.get(level)
+        if simplified is None:
+            # relative to the first point so that float32 keeps the precision
+            origin = points[0]
+            simplified = cv2.approxPolyDP(
+                (points - origin).astype(np.float32),
+                2.0 ** level,
+                self.closed
+            ).reshape(-1, 2) + origin
+            if len(simplified) < 2 or len(simplified) >= len(points):
+                simplified = points
+            else:
+                simplified.setflags(write=False)
+            self._lod[level] = simplified
+        return simplified
     
     def copy(self):
         """Create a copy of the trace object.
+
+        The points and history are shared until one of the traces replaces them.
         
             Returns:
                 (Trace): a copy of the object
         """
-        copy_trace = Trace("", [0,0,0])
-        copy_trace.__dict__ = self.__dict__.copy()
-        copy_trace.points = self.points.copy()
+        copy_trace = Trace.__new__(Trace)
+        for attr in Trace.__slots__:
+            setattr(copy_trace, attr, getattr(self, attr))
         copy_trace.tags = self.tags.copy()
-        copy_trace.history = [l.copy() for l in self.history]
         return copy_trace
     
     def add(self, point : tuple):
@@ -48,7 +146,7 @@ class Trace():
             Params:
                 point (tuple): a coordinate pair
         """
-        self.points.append(point)
+        self.points = np.concatenate((self._points, [point]))
     
     def isSameTrace(self, other) -> bool:
         """Check if traces have the same name, color, and points.
@@ -62,7 +160,7 @@ class Trace():
             return False
         if self.color != other.color:
             return False
-        if self.points != other.points:
+        if not np.array_equal(self._points, other._points):
             return False
         return True
 
@@ -74,14 +172,10 @@ class Trace():
             Returns:
                 (bool): whether or not trace traces overlap
         """
-        if len(self.points) != len(other.points):
+        if self._points.shape != other._points.shape:
             return False
         
-        for (x1, y1), (x2, y2) in zip(self.points, other.points):
-            if abs(x1-x2) > 1e-6 or abs(y1-y2) > 1e-6:
-                return False
-        
-        return True
+        return bool(np.all(np.abs(self._points - other._points) <= 1e-6))
     
     def setHidden(self, hidden=True):
         """Set whether the trace is hidden.
@@ -107,10 +201,8 @@ class Trace():
             Returns:
                 (list) list containing the trace data
         """
-        x, y = [], []
-        for p in self.points:
-            x.append(round(p[0], 7))
-            y.append(round(p[1], 7))
+        x = [round(v, 7) for v in self._points[:, 0].tolist()]
+        y = [round(v, 7) for v in self._points[:, 1].tolist()]
         
         l = []
         if include_name:
@@ -220,7 +312,7 @@ class Trace():
 
         new_trace = Trace(name, color, closed)
         new_trace.negative = negative
-        new_trace.points = list(zip(x, y))
+        new_trace.points = np.column_stack((x, y)) if x else no_points
         new_trace.hidden = hidden
         new_trace.fill_mode = fill_mode
         new_trace.tags = set(tags)
@@ -277,14 +369,12 @@ class Trace():
                 (float) max y value
         """
         if tform is None:
-            x = [p[0] for p in self.points]
-            y = [p[1] for p in self.points]
+            points = self._points
         else:
-            tform_points = tform.map(self.points)
-            x = [p[0] for p in tform_points]
-            y = [p[1] for p in tform_points]
-        
-        return min(x), min(y), max(x), max(y)
+            points = tform.mapArray(self._points)
+        xmin, ymin = points.min(axis=0).tolist()
+        xmax, ymax = points.max(axis=0).tolist()
+        return xmin, ymin, xmax, ymax
     
     def getMidpoint(self, tform : Transform = None) -> tuple:
         """Get the midpoint of the trace (avg of extremes).
@@ -303,7 +393,7 @@ class Trace():
             Params:
                 tform (Transform): the transform to apply to the points
         """
-        points = self.points.copy()
+        points = self.points
         if tform:
             points = tform.map(points)
         cx, cy = centroid(points)
@@ -321,7 +411,7 @@ class Trace():
             Params:
                 new_radius (float): the new radius for the trace
         """
-        points = self.points.copy()
+        points = self.points
         
         # calculate constants
         cx, cy = centroid(points)
@@ -346,11 +436,7 @@ class Trace():
                 prev_mag (float): the previous magnification
                 new_mag (float): the new magnification
         """
-        for i, p in enumerate(self.points):
-            x, y = p
-            x *= new_mag / prev_mag
-            y *= new_mag / prev_mag
-            self.points[i] = (x, y)
+        self.points = self._points * (new_mag / prev_mag)
     
     def addLog(self, message : str):
         """Add a log to the trace history.
@@ -358,7 +444,7 @@ class Trace():
             Params:
                 message (str): the log message
         """
-        self.history.append(TraceLog(message))
+        self._history += (TraceLog(message),)
     
     def mergeHistory(self, other_trace):
         """Merge the history of two traces.
@@ -366,8 +452,7 @@ class Trace():
             Params:
                 other_trace (Trace): the trace to merge histories with
         """
-        self.history += other_trace.history
-        self.history.sort()
+        self._history = tuple(sorted(self._history + other_trace.history))
     
     def isNew(self):
         """Returns True if the trace has no existing history."""
@@ -414,7 +499,7 @@ def getLegacyRadius(trace : Trace):
         "plus": 12.649110640673518,
         "straight_arrow": 16.646921637347848
     }
-    l = len(trace.points)
+    l = trace.getPointCount()
     if l == 3:
         trace_type = "triangle"
     elif l == 4:
@@ -429,7 +514,7 @@ def getLegacyRadius(trace : Trace):
         trace_type = "star"
     elif l == 12:
         # three possibilities for length 12
-        x, y = trace.points[0]
+        x, y = trace.getPointArray()[0].tolist()
         if x < 0 and y > 0:
             if abs(abs(x) - abs(y) < 1e-6):
                 trace_type = "cross"
@@ -0,0 +1,163 @@
+import math
+
+from .transform import Transform
+
+# traces covering more cells than this are checked on every query
+max_cells_per_trace = 64
+
+class TraceIndex():
+
+    def __init__(self, traces : list, tform : Transform, previous=None):
+        """Create a uniform grid of the transformed trace bounds on a section.
+
+        The transformed bounds of a trace are the bounds of its transformed
+        bounding box, which contain the transformed trace (exact unless the
+        transform rotates or shears). Queries return the traces whose bounds
+        overlap a rectangle in field coordinates; the caller does any exact tests.
+
+            Params:
+                traces (list): the traces on the section
+                tform (Transform): the alignment transform for the section
+                previous (TraceIndex): an index for the same traces (reuses the untransformed bounds)
+        """
+        self.tform = tform.copy()
+        self.entries = {}  # id(trace) : (trace, untransformed bounds, bounds, cells, order)
+        self.grid = {}  # (column, row) : set of trace ids
+        self.large = set()  # ids of traces that cover too many cells
+        self.count = 0  # the order of the next trace added
+
+        raw_bounds = []
+        for trace in traces:
+            entry = previous.entries.get(id(trace)) if previous else None
+            if entry is not None and entry[0] is trace:
+                raw_bounds.append(entry[1])
+            else:
+                raw_bounds.append(trace.getBounds())
+        bounds = [self.mapBounds(b) for b in raw_bounds]
+
+        # cells are about the size of a typical trace
+        sizes = sorted(max(b[2] - b[0], b[3] - b[1]) for b in bounds)
+        if sizes and sizes[len(sizes) // 2] > 0:
+            self.cell_size = sizes[len(sizes) // 2] * 2
+        else:
+            self.cell_size = 1
+
+        for trace, raw_b, b in zip(traces, raw_bounds, bounds):
+            self._insert(trace, raw_b, b)
+
+    def isValid(self, tform : Transform) -> bool:
+        """Check if the index was made with a transform.
+
+            Params:
+                tform (Transform): the current alignment transform for the section
+        """
+        return self.tform.getList() == tform.getList()
+
+    def mapBounds(self, bounds : tuple) -> tuple:
+        """Get the transformed bounds of a bounding box.
+
+            Params:
+                bounds (tuple): xmin, ymin, xmax, ymax
+            Returns:
+                (tuple): xmin, ymin, xmax, ymax after the transform
+        """
+        xmin, ymin, xmax, ymax = bounds
+        corners = self.tform.map([(xmin, ymin), (xmin, ymax), (xmax, ymin), (xmax, ymax)])
+        x = [p[0] for p in corners]
+        y = [p[1] for p in corners]
+        return min(x), min(y), max(x), max(y)
+
+    def _getCells(self, bounds : tuple) -> tuple:
+        """Get the range of cells covered by bounds.
+
+            Returns:
+                (tuple): first column, first row, last column, last row
+        """
+        xmin, ymin, xmax, ymax = bounds
+        return (
+            math.floor(xmin / self.cell_size),
+            math.floor(ymin / self.cell_size),
+            math.floor(xmax / self.cell_size),
+            math.floor(ymax / self.cell_size)
+        )
+
+    def _insert(self, trace, raw_bounds : tuple, bounds : tuple):
+        """Add a trace with known bounds to the index."""
+        key = id(trace)
+        c0, r0, c1, r1 = self._getCells(bounds)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > max_cells_per_trace:
+            cells = None
+            self.large.add(key)
+        else:
+            cells = (c0, r0, c1, r1)
+            for c in range(c0, c1 + 1):
+                for r in range(r0, r1 + 1):
+                    if (c, r) not in self.grid:
+                        self.grid[(c, r)] = set()
+                    self.grid[(c, r)].add(key)
+        self.entries[key] = (trace, raw_bounds, bounds, cells, self.count)
+        self.count += 1
+
+    def add(self, trace):
+        """Add a trace to the index.
+
+            Params:
+                trace (Trace): the trace to add
+        """
+        if id(trace) in self.entries:
+            self.remove(trace)
+        raw_bounds = trace.getBounds()
+        self._insert(trace, raw_bounds, self.mapBounds(raw_bounds))
+
+    def remove(self, trace):
+        """Remove a trace from the index.
+
+            Params:
+                trace (Trace): the trace to remove
+        """
+        entry = self.entries.pop(id(trace), None)
+        if entry is None:
+            return
+        key = id(trace)
+        cells = entry[3]
+        if cells is None:
+            self.large.discard(key)
+            return
+        c0, r0, c1, r1 = cells
+        for c in range(c0, c1 + 1):
+            for r in range(r0, r1 + 1):
+                cell = self.grid.get((c, r))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del(self.grid[(c, r)])
+
+    def query(self, bounds : tuple) -> list:
+        """Get the traces whose transformed bounds overlap a rectangle.
+
+            Params:
+                bounds (tuple): xmin, ymin, xmax, ymax in field coordinates
+            Returns:
+                (list): the traces (in the order they were added)
+        """
+        xmin, ymin, xmax, ymax = bounds
+        c0, r0, c1, r1 = self._getCells(bounds)
+        ncells = (c1 - c0 + 1) * (r1 - r0 + 1)
+        if ncells >= len(self.grid):
+            # the rectangle covers most of the grid
+            keys = self.entries.keys()
+        else:
+            keys = set(self.large)
+            for c in range(c0, c1 + 1):
+                for r in range(r0, r1 + 1):
+                    cell = self.grid.get((c, r))
+                    if cell:
+                        keys.update(cell)
+
+        found = []
+        for key in keys:
+            trace, _, (txmin, tymin, txmax, tymax), _, order = self.entries[key]
+            if not (txmax < xmin or txmin > xmax or tymax < ymin or tymin > ymax):
+                found.append((order, trace))
+        found.sort(key=lambda item : item[0])
+        return [trace for order, trace in found]
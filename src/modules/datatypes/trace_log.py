@@ -3,6 +3,8 @@ from datetime import datetime
 
 class TraceLog():
 
+    __slots__ = ("dt", "username", "message")
+
     def __init__(self, *args):
         """Create a new trace log.
         
@@ -37,4 +39,4 @@ class TraceLog():
         return self.dt < other.dt
     
     def copy(self):
-        return TraceLog(list(self).copy())
+        return TraceLog(list(self))
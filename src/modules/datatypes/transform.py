@@ -13,7 +13,29 @@ class Transform():
                 tform_list (list): the tform as a six-number list
         """
         self.tform = tform_list
-        self.qtform = self.getQTransform()
+        self.update()
+    
+    def update(self):
+        """Update the matrix after the tform list is changed."""
+        self.matrix = np.array(self.tform, dtype=float).reshape(2, 3)
+        self.inverse = None  # (six-number list, matrix) computed when first needed
+    
+    def getInverse(self) -> tuple:
+        """Get the inverse of the transform (cached).
+        
+            Returns:
+                (list): the inverse as a six-number list
+                (np.ndarray): the inverse as a 2x3 matrix
+        """
+        if self.inverse is None:
+            a, b, c, d, e, f = self.tform
+            det = a * e - b * d
+            if abs(det) <= 1e-12:  # same tolerance as QTransform.inverted
+                raise Exception("Matrix is not invertible.")
+            ia, ib, ic, ie = e / det, -b / det, -d / det, a / det
+            t = [ia, ib, -(ia * c + ib * f), ic, ie, -(ic * c + ie * f)]
+            self.inverse = (t, np.array(t, dtype=float).reshape(2, 3))
+        return self.inverse
     
     def getQTransform(self) -> QTransform:
         """Get the transform as a QTransform object.
@@ -52,19 +74,69 @@ class Transform():
                 (tuple): an x, y coordinate pair to transform
                 OR
                 (list): a list of points to transform
+                OR
+                (np.ndarray): an N x 2 array of points to transform
+                inverted (bool): True if the inverse transform should be applied
             Returns:
-                (tuple) OR (list): the transformed point or points
+                (tuple) OR (list) OR (np.ndarray): the transformed point or points
         """
-        if inverted:
-            qtform, invertible = self.qtform.inverted()
-            if not invertible:
-                raise Exception("Matrix is not invertible.")
-        else:
-            qtform = self.qtform
         if len(args) == 2:
-            return qtform.map(args[0], args[1])
+            if inverted:
+                a, b, c, d, e, f = self.getInverse()[0]
+            else:
+                a, b, c, d, e, f = self.tform
+            x, y = args
+            return a * x + b * y + c, d * x + e * y + f
         elif len(args) == 1:
-            return [qtform.map(*p) for p in args[0]]
+            points = args[0]
+            if type(points) is np.ndarray:
+                return self.mapArray(points, inverted)
+            return list(map(tuple, self.mapArray(points, inverted).tolist()))
+    
+    def mapArray(self, points, inverted=False) -> np.ndarray:
+        """Apply the transform to an array of points.
+        
+            Params:
+                points (np.ndarray): the N x 2 points (or anything that can be made into one)
+                inverted (bool): True if the inverse transform should be applied
+            Returns:
+                (np.ndarray): the N x 2 transformed points
+        """
+        m = self.getInverse()[1] if inverted else self.matrix
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return points @ m[:, :2].T + m[:, 2]
+    
+    def mapMany(self, point_lists : list, inverted=False, as_arrays=False) -> list:
+        """Apply the transform to many lists of points at once (ex. every trace on a section).
+        
+            Params:
+                point_lists (list): the lists of points
+                inverted (bool): True if the inverse transform should be applied
+                as_arrays (bool): True if N x 2 arrays should be returned instead of lists of points
+            Returns:
+                (list): the transformed points for each list
+        """
+        if not point_lists:
+            return []
+        lengths = [len(points) for points in point_lists]
+        offsets = np.cumsum(lengths)[:-1]
+        tformed = self.mapArray(
+            np.concatenate([np.asarray(points, dtype=float).reshape(-1, 2) for points in point_lists]),
+            inverted
+        )
+        if as_arrays:
+            return np.split(tformed, offsets)
+        tformed = list(map(tuple, tformed.tolist()))
+        return [tformed[i:j] for i, j in zip([0, *offsets], [*offsets, len(tformed)])]
+    
+    def getScale(self) -> float:
+        """Get the average factor that the transform scales distances by.
+        
+            Returns:
+                (float): the square root of the area scale
+        """
+        a, b, c, d, e, f = self.tform
+        return abs(a * e - b * d) ** 0.5
     
     def getList(self) -> list:
         """Get the tform list numbers.
@@ -80,18 +152,25 @@ class Transform():
             Returns:
                 (Transform): the inverted transform
         """
-        t, invertible = self.qtform.inverted()
-        if not invertible:
-            raise Exception("Matrix is not invertible")
-        return Transform.fromQTransform(t)
+        t = Transform(self.getInverse()[0].copy())
+        t.inverse = (self.tform.copy(), self.matrix)
+        return t
     
     def copy(self):
         return Transform(self.tform.copy())
     
     def __mul__(self, other):
-        """Compose two transforms."""
-        q_composed = self.getQTransform() * other.getQTransform()
-        return Transform.fromQTransform(q_composed)
+        """Compose two transforms (self is applied first, as with QTransform)."""
+        a1, b1, c1, d1, e1, f1 = self.tform
+        a2, b2, c2, d2, e2, f2 = other.tform
+        return Transform([
+            a2 * a1 + b2 * d1,
+            a2 * b1 + b2 * e1,
+            a2 * c1 + b2 * f1 + c2,
+            d2 * a1 + e2 * d1,
+            d2 * b1 + e2 * e1,
+            d2 * c1 + e2 * f1 + f2
+        ])
     
     def magScale(self, prev_mag : float, new_mag : float):
         """Scale the transform to magnification changes.
@@ -102,6 +181,7 @@ class Transform():
         """
         self.tform[2] *= new_mag / prev_mag
         self.tform[5] *= new_mag / prev_mag
+        self.update()
     
     def estimateLinearTform(pts1, pts2):
         """Estimate the transform that converts pts1 to pts2."""
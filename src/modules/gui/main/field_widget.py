@@ -1,5 +1,6 @@
 import os
 import time
+import traceback
 
 from PySide6.QtWidgets import (
     QWidget, 
@@ -11,7 +12,8 @@ from PySide6.QtCore import (
     Qt, 
     QPoint, 
     QEvent,
-    QTimer
+    QTimer,
+    Slot
 )
 from PySide6.QtGui import (
     QPixmap, 
@@ -27,7 +29,7 @@ from PySide6.QtGui import (
 
 from modules.datatypes import Series, Trace, Ztrace
 from modules.calc import pixmapPointToField, distance
-from modules.backend.view import FieldView
+from modules.backend.view import FieldView, prefetcher
 from modules.backend.table import (
     ObjectTableManager,
     SectionTableManager,
@@ -71,6 +73,10 @@ class FieldWidget(QWidget, FieldView):
         self.trace_table_manager = None
         self.section_table_manager = None
 
+        # section layer placeholders
+        self.section_layer = None
+        self.b_section_layer = None
+
         # misc defaults
         self.current_trace = []
         self.max_click_time = 0.15
@@ -103,6 +109,11 @@ class FieldWidget(QWidget, FieldView):
             self.section_table_manager.close()
             self.section_table_manager = None
         
+        # stop loading data for the previous series
+        prefetcher.cancel()
+        # release the images of the previous series
+        self.closeLayers()
+        
         self.series = series
         FieldView.__init__(self, series)
 
@@ -230,20 +241,24 @@ class FieldWidget(QWidget, FieldView):
         
         self.setView(new_mag)
     
-    def generateView(self, generate_image=True, generate_traces=True, update=True):
+    def generateView(self, generate_image=True, generate_traces=True, update=True, pan=False):
         """Generate the output view.
         
             Params:
                 generate_image (bool): True if image should be regenerated
                 generate_traces (bool): True if traces should be regenerated
                 update (bool): True if view widget should be updated
+                pan (bool): True if the window was only panned (the traces are unchanged)
         """
         self.field_pixmap = FieldView.generateView(
             self,
             self.pixmap_dim,
             generate_image,
             generate_traces,
-            blend=self.blend_sections
+            blend=self.blend_sections,
+            image_callback=self.imageLayerRendered,
+            image_error_callback=self.imageLayerFailed,
+            pan=pan
         )
         try:
             self.checkActions()
@@ -252,6 +267,46 @@ class FieldWidget(QWidget, FieldView):
         if update:
             self.update()
     
+    @Slot(object)
+    def imageLayerRendered(self, result : tuple):
+        """Called when an image layer has finished rendering in the background.
+        
+            Params:
+                result (tuple): the section layer, render id, render parameters, and rendered image
+        """
+        layer, render_id, params, image = result
+        if layer is not self.section_layer and layer is not self.b_section_layer:
+            return
+        image_layer = layer.receiveImageLayer(render_id, params, image)
+        if image_layer is None:
+            return
+        layer.image_layer = image_layer
+        # keep the preview while the user is panning or zooming
+        if self.is_panzooming:
+            return
+        self.generateView(generate_image=False, generate_traces=False)
+    
+    @Slot(tuple)
+    def imageLayerFailed(self, error : tuple):
+        """Called when an image layer could not be rendered in the background (the preview would stay otherwise).
+        
+            Params:
+                error (tuple): the exception type, value, traceback, and the render arguments
+        """
+        layer, render_id, params = error[3]
+        if layer is not self.section_layer and layer is not self.b_section_layer:
+            return
+        # try again in the main thread
+        try:
+            image_layer = layer.recoverImageLayer(render_id, params)
+        except Exception:
+            traceback.print_exc()
+            return
+        if image_layer is None:
+            return
+        layer.image_layer = image_layer
+        self.generateView(generate_image=False, generate_traces=False)
+    
     def openObjectList(self):
         """Open an object list."""
         # create the manager if not already
@@ -1051,6 +1106,20 @@ class FieldWidget(QWidget, FieldView):
         else:
             x, y = 0, 0
             w, h = self.pixmap_dim
+        # warm the image ahead of the pan direction
+        if move_x or move_y:
+            screen_mag = self.series.window[2] / self.pixmap_dim[0]
+            window_x, window_y, window_w, window_h = tuple(self.series.window)
+            prefetcher.prefetchView(
+                self.section_layer,
+                self.pixmap_dim,
+                [
+                    window_x - 2 * move_x * screen_mag,
+                    window_y + 2 * move_y * screen_mag,
+                    window_w,
+                    window_h
+                ]
+            )
         # adjust field
         new_field = QPixmap(*self.pixmap_dim)
         new_field.fill(QColor(0, 0, 0))
@@ -1117,7 +1186,7 @@ class FieldWidget(QWidget, FieldView):
             self.series.window[1] += move_y
         
         self.is_panzooming = False        
-        self.generateView()
+        self.generateView(pan=True)
 
     def mousePanzoomRelease(self, event):
         """Called when mouse is released in panzoom mode."""